@@ -4,20 +4,44 @@ from langchain.schema import Document
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional, Tuple
 import logging
-from langchain_community.document_loaders import WebBaseLoader
+import json
+import re
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
 import config
 import utils
+import cache
+import state
+import ratelimit
+import http_client
+import crawler
+import extract
+import archive
+import chunking
+import news_docs
+import urls
 import retriever as db_retriever # Use alias to avoid confusion
 
 # Initialize NewsAPI client
 try:
-    newsapi = NewsApiClient(api_key=config.NEWS_API_KEY)
+    # Rate limiting sits behind the cache so cache hits never wait for a token
+    newsapi = ratelimit.RateLimitedClient(NewsApiClient(api_key=config.NEWS_API_KEY), "newsapi")
+    if config.NEWS_CACHE_ENABLED:
+        newsapi = cache.CachedNewsApiClient(newsapi, cache.get_news_cache())
 except Exception as e:
     logging.error(f"Failed to initialize NewsAPI client: {e}")
     newsapi = None
 
+# Per-competitor high-water marks for incremental news sync
+news_sync_state = state.StateStore("news_sync")
+# Canonical URLs of every article ingested so far, so re-published/syndicated copies are skipped
+news_seen_urls = urls.SeenUrls("news")
+# Extracted full article text, keyed by URL
+article_cache = cache.get_article_cache()
+
 # Initialize LLM globally (or pass it around)
 try:
     llm = ChatGoogleGenerativeAI(
@@ -31,8 +55,188 @@ except Exception as e:
     llm = None
 
 
-def collect_news_data(competitor_name: str, days_back: int) -> List[Document]:
-    """Fetches news articles about the competitor from the last N days."""
+def _fetch_news_page(params: Dict, page: int) -> Dict:
+    """Fetches a single page of NewsAPI results. Returns an empty dict on failure."""
+    try:
+        response = newsapi.get_everything(page=page, **params)
+    except Exception as e:
+        logging.error(f"Error fetching news page {page} from NewsAPI: {e}")
+        return {}
+    if response and response.get('status') == 'ok':
+        archive.store('newsapi', json.dumps(response).encode('utf-8'), competitor=params.get('q', ''),
+                      meta={**params, "page": page})
+    return response
+
+def _news_query_params(competitor_name: str, from_param: str, pages: int = 1) -> Dict:
+    """Builds the get_everything() parameters for a competitor query."""
+    return {
+        "q": competitor_name,
+        "language": 'en',
+        "from_param": from_param,
+        "sort_by": 'relevancy', # Options: relevancy, popularity, publishedAt
+        "page_size": config.NEWS_API_MAX_RESULTS if pages <= 1 else config.NEWS_API_PAGE_SIZE,
+    }
+
+def _iter_news_pages(params: Dict, pages: int, max_workers: int = config.NEWS_API_MAX_WORKERS) -> Iterator[List[Dict]]:
+    """
+    Yields the articles of pages 1..N of a NewsAPI query, in page order and de-duplicated by canonical URL.
+    Pages are fetched concurrently but only `max_workers` are downloaded ahead of the consumer,
+    so memory stays flat no matter how many pages are requested.
+    """
+    seen_urls = set()
+    with ratelimit.ContextThreadPoolExecutor(max_workers=max(1, min(max_workers, pages))) as executor:
+        in_flight = deque()
+        next_page = 1
+        while in_flight or next_page <= pages:
+            while next_page <= pages and len(in_flight) < max_workers:
+                in_flight.append((next_page, executor.submit(_fetch_news_page, params, next_page)))
+                next_page += 1
+            page, future = in_flight.popleft()
+            response = future.result()
+            if not response or response.get('status') != 'ok':
+                logging.warning(f"NewsAPI page {page} failed or returned no articles. Status: {response.get('status', 'N/A')}")
+                continue
+
+            page_articles = []
+            for article in response.get('articles', []):
+                url = urls.canonicalize_url(article.get('url') or '')
+                if url and url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                page_articles.append(article)
+            yield page_articles
+
+            if len(response.get('articles', [])) < params.get('page_size', 0):
+                # Last page reached, later pages can only be empty
+                for _, pending in in_flight:
+                    pending.cancel()
+                break
+
+def _fetch_news_pages(params: Dict, pages: int, max_workers: int = config.NEWS_API_MAX_WORKERS) -> List[Dict]:
+    """
+    Fetches pages 1..N of a NewsAPI query concurrently (at most `max_workers` in flight).
+    Articles are merged in page order and de-duplicated by URL.
+    """
+    return [article for page_articles in _iter_news_pages(params, pages, max_workers) for article in page_articles]
+
+def _backfill_news_articles(params: Dict, max_workers: int = config.NEWS_API_MAX_WORKERS) -> Tuple[List[Dict], bool]:
+    """
+    Fetches a whole window by splitting it into date buckets queried concurrently, so the
+    per-query result cap no longer truncates high-volume competitors.
+    - A probe query estimates article density; sparse days are merged into wider buckets.
+    - A bucket that still overflows its page is split in half and re-fetched (down to one day).
+    Returns (articles newest bucket first, de-duplicated by URL, complete); complete is False if
+    any request failed. A single day that still overflows is logged but can't be fetched further.
+    """
+    page_size = config.NEWS_API_PAGE_SIZE
+    probe = _fetch_news_page({**params, "page_size": page_size}, 1)
+    if not probe or probe.get('status') != 'ok':
+        logging.warning(f"NewsAPI backfill probe failed. Status: {probe.get('status', 'N/A')}")
+        return [], False
+    total = probe.get('totalResults', 0)
+    if total <= len(probe.get('articles', [])):
+        return probe.get('articles', []), True # Whole window fits in one page, no backfill needed
+
+    start_day = datetime.strptime(params['from_param'][:10], '%Y-%m-%d').date()
+    end_day = datetime.now().date()
+    n_days = (end_day - start_day).days + 1
+    days_per_bucket = max(1, int(page_size * n_days / total)) # Aim for about one page per bucket
+    buckets = []
+    first = start_day
+    while first <= end_day:
+        last = min(first + timedelta(days=days_per_bucket - 1), end_day)
+        buckets.append((first, last))
+        first = last + timedelta(days=1)
+    logging.info(f"Backfilling {total} articles over {n_days} days in {len(buckets)} bucket(s) of {days_per_bucket} day(s).")
+
+    def fetch_bucket(first, last) -> Dict:
+        bucket_params = {
+            **params,
+            "page_size": page_size,
+            "from_param": params['from_param'] if first == start_day else f"{first}T00:00:00",
+            "to": f"{last}T23:59:59",
+        }
+        return _fetch_news_page(bucket_params, 1)
+
+    results = {}
+    complete = True
+    with ratelimit.ContextThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = {executor.submit(fetch_bucket, *bucket): bucket for bucket in buckets}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                first, last = pending.pop(future)
+                response = future.result()
+                articles = response.get('articles', []) if response.get('status') == 'ok' else []
+                if response.get('status') != 'ok':
+                    logging.warning(f"NewsAPI bucket {first}..{last} failed. Status: {response.get('status', 'N/A')}")
+                    complete = False
+                results[(first, last)] = articles
+                overflow = response.get('totalResults', 0) - len(articles)
+                if overflow > 0 and first < last:
+                    mid = first + (last - first) // 2
+                    for half in ((first, mid), (mid + timedelta(days=1), last)):
+                        pending[executor.submit(fetch_bucket, *half)] = half
+                elif overflow > 0:
+                    logging.warning(f"NewsAPI bucket {first} still has {overflow} articles beyond the page cap.")
+
+    merged = []
+    seen_urls = set()
+    for bucket in sorted(results, key=lambda b: (b[0], -b[1].toordinal()), reverse=True):
+        for article in results[bucket]:
+            url = urls.canonicalize_url(article.get('url') or '')
+            if url and url in seen_urls:
+                continue
+            seen_urls.add(url)
+            merged.append(article)
+    return merged, complete
+
+def _fetch_news_since(params: Dict, since: Optional[str], max_pages: int) -> Tuple[List[Dict], bool]:
+    """
+    Pages through a query sorted by publishedAt (newest first) until it reaches `since` (the
+    exclusive 'publishedAt' high-water mark) or runs out of results. Pages are fetched one at a
+    time because each one decides whether the next is needed.
+    Returns (articles newer than `since`, de-duplicated by canonical URL, complete); complete is
+    False if a page failed or `max_pages` ran out first, so older new articles may be missing.
+    """
+    articles = []
+    seen_urls = set()
+    for page in range(1, max_pages + 1):
+        response = _fetch_news_page(params, page)
+        if not response or response.get('status') != 'ok':
+            logging.warning(f"NewsAPI page {page} failed. Status: {response.get('status', 'N/A')}")
+            return articles, False
+        page_articles = response.get('articles', [])
+        for article in page_articles:
+            if since and (article.get('publishedAt') or '') <= since:
+                return articles, True # Reached the mark: everything older was stored by an earlier sync
+            url = urls.canonicalize_url(article.get('url') or '')
+            if url and url in seen_urls:
+                continue
+            seen_urls.add(url)
+            articles.append(article)
+        if len(page_articles) < params['page_size']:
+            return articles, True
+    return articles, False
+
+def collect_news_data(competitor_name: str, days_back: int, pages: int = 1, incremental: bool = False,
+                      backfill: bool = False, skip_seen: bool = False,
+                      pending: state.PendingState = state.IMMEDIATE) -> List[Document]:
+    """
+    Fetches news articles about the competitor from the last N days.
+    With pages > 1, fetches that many pages of config.NEWS_API_PAGE_SIZE results concurrently
+    and merges them (de-duplicated by canonical URL, in page order).
+    With incremental=True, only articles newer than the competitor's stored high-water mark
+    (newest 'publishedAt' seen by a previous sync) are fetched and returned: the query is sorted by
+    publishedAt and paged until it reaches the mark (`pages` is ignored). If that takes more than
+    NEWS_INCREMENTAL_MAX_PAGES pages, the window is backfilled by date instead. The mark only
+    advances when every new article was fetched.
+    With backfill=True, the window is split into date buckets fetched concurrently for full
+    coverage (`pages` is ignored).
+    With skip_seen=True, articles whose canonical URL was stored by an earlier run are dropped.
+    The high-water mark and seen URLs are queued on `pending`: commit it only once the returned
+    Documents are stored, otherwise a failed store would skip those articles for good.
+    """
     if not newsapi:
         logging.error("NewsAPI client not initialized.")
         return []
@@ -41,74 +245,193 @@ def collect_news_data(competitor_name: str, days_back: int) -> List[Document]:
         return []
 
     start_date_str = utils.get_date_n_days_ago(days_back)
-    logging.info(f"Fetching news for '{competitor_name}' from {start_date_str}...")
+    from_param = start_date_str
+    sync_key = competitor_name.strip().lower()
+    mark = news_sync_state.get(sync_key) if incremental else None
+    if mark and mark['window_start'] <= start_date_str:
+        # NewsAPI accepts 'YYYY-MM-DDTHH:MM:SS'; drop the trailing 'Z' of publishedAt
+        from_param = max(start_date_str, mark['newest_published'][:19])
+        logging.info(f"Incremental sync for '{competitor_name}': high-water mark {mark['newest_published']}.")
+    else:
+        mark = None # No usable mark (first sync or a wider window than before): fetch the full window
+    logging.info(f"Fetching news for '{competitor_name}' from {from_param} ({pages} page(s))...")
 
-    try:
-        all_articles = newsapi.get_everything(
-            q=competitor_name,
-            language='en',
-            from_param=start_date_str,
-            sort_by='relevancy', # Options: relevancy, popularity, publishedAt
-            page_size=config.NEWS_API_MAX_RESULTS
-        )
-    except Exception as e:
-        logging.error(f"Error fetching news from NewsAPI: {e}")
-        return []
+    params = _news_query_params(competitor_name, from_param, pages)
+    complete = True
+    if incremental:
+        # Newest first, so the mark is never taken from a relevance-truncated slice
+        params.update(sort_by='publishedAt', page_size=config.NEWS_API_PAGE_SIZE)
+    if backfill:
+        articles, complete = _backfill_news_articles(params)
+    elif incremental:
+        articles, complete = _fetch_news_since(params, mark['newest_published'] if mark else None,
+                                               config.NEWS_INCREMENTAL_MAX_PAGES)
+        if not complete:
+            logging.info(f"Could not page back to the mark for '{competitor_name}'; backfilling the window by date.")
+            articles, complete = _backfill_news_articles(params)
+    else:
+        articles = _fetch_news_pages(params, max(1, pages))
+    if mark:
+        # 'from' is inclusive, so drop the article(s) at the mark itself
+        articles = [a for a in articles if (a.get('publishedAt') or '') > mark['newest_published']]
+    logging.info(f"Received {len(articles)} unique {'new ' if mark else ''}articles from NewsAPI.")
 
-    docs = []
-    if all_articles and all_articles['status'] == 'ok':
-        logging.info(f"Received {len(all_articles['articles'])} articles from NewsAPI.")
-        for article in all_articles['articles']:
-            # Basic cleaning - can be expanded in utils
-            content = utils.clean_text(article.get('content') or article.get('description') or "")
-            if not content: # Skip articles with no usable content
-                continue
+    if incremental and articles and not complete:
+        logging.warning(f"Some NewsAPI requests for '{competitor_name}' failed; keeping the high-water mark "
+                        f"so the missing articles are fetched next time.")
+    elif incremental and articles:
+        newest = max(a.get('publishedAt') or '' for a in articles)
+        pending.set(news_sync_state, sync_key, {
+            "newest_published": max(newest, mark['newest_published']) if mark else newest,
+            "window_start": mark['window_start'] if mark else start_date_str,
+        })
 
-            metadata = {
-                "source": "newsapi",
-                "competitor": competitor_name,
-                "title": article.get('title', 'N/A'),
-                "url": article.get('url', 'N/A'),
-                "publish_date": article.get('publishedAt', 'N/A') # Keep original format for now
-            }
-            docs.append(Document(page_content=content, metadata=metadata))
-    else:
-        logging.warning(f"NewsAPI request failed or returned no articles. Status: {all_articles.get('status', 'N/A')}")
+    if skip_seen and articles:
+        unseen = [a for a in articles if not a.get('url') or a['url'] not in news_seen_urls]
+        if len(unseen) < len(articles):
+            logging.info(f"Skipped {len(articles) - len(unseen)} articles already ingested under the same canonical URL.")
+        articles = unseen
 
+    docs = news_docs.articles_to_docs(articles, competitor_name)
+    if skip_seen:
+        pending.call(news_seen_urls.add_many, [doc.metadata['url'] for doc in docs if doc.metadata['url'] != 'N/A'])
     logging.info(f"Created {len(docs)} Document objects from fetched news.")
     return docs
 
+def iter_news_data(competitor_name: str, days_back: int, pages: int = 1) -> Iterator[Document]:
+    """
+    Streaming variant of collect_news_data: yields cleaned Documents page by page while later
+    pages are still downloading, so downstream chunking/embedding can start right away.
+    """
+    if not newsapi:
+        logging.error("NewsAPI client not initialized.")
+        return
+    if not competitor_name:
+        logging.warning("No competitor name provided for news search.")
+        return
+
+    start_date_str = utils.get_date_n_days_ago(days_back)
+    logging.info(f"Streaming news for '{competitor_name}' from {start_date_str} ({pages} page(s))...")
+    params = _news_query_params(competitor_name, start_date_str, pages)
+    count = 0
+    for page_articles in _iter_news_pages(params, max(1, pages)):
+        for doc in news_docs.articles_to_docs(page_articles, competitor_name):
+            count += 1
+            yield doc
+    logging.info(f"Streamed {count} Document objects from fetched news.")
+
+def _load_article_text(url: str) -> str:
+    """Returns the cleaned full text of an article, from the local cache when already fetched."""
+    key = cache.ResponseCache.make_key("article", url)
+    cached = article_cache.get(key)
+    if cached is not None:
+        return cached
+    result = http_client.fetch(url, content_types=crawler.HTML_CONTENT_TYPES)
+    if not result.ok:
+        return ""
+    archive.store('article', result.body, url=url, meta={"encoding": result.encoding})
+    if config.HTML_EXTRACTOR == 'lxml':
+        text = extract.extract_main_content(result.text)[1]
+    else:
+        text = utils.clean_text(utils.extract_article_text(result.text))
+    if text:
+        article_cache.set(key, text)
+    return text
+
+def enrich_news_documents(docs: List[Document], max_workers: int = config.ARTICLE_FETCH_MAX_WORKERS) -> List[Document]:
+    """
+    Replaces truncated NewsAPI content with the full article text fetched from each URL.
+    Downloads run concurrently through the shared HTTP pool (per-host limits, timeouts, size cap).
+    Documents whose page cannot be fetched keep their original stub.
+    """
+    article_urls = list(dict.fromkeys(doc.metadata.get('url') for doc in docs if doc.metadata.get('url', 'N/A') != 'N/A'))
+    if not article_urls:
+        return docs
+
+    logging.info(f"Fetching full text for {len(article_urls)} news articles...")
+    with ratelimit.ContextThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        texts = dict(zip(article_urls, executor.map(_load_article_text, article_urls)))
+
+    enriched = 0
+    for doc in docs:
+        full_text = texts.get(doc.metadata.get('url'))
+        if full_text and len(full_text) > len(doc.page_content):
+            doc.page_content = full_text
+            doc.metadata['full_text'] = True
+            enriched += 1
+    logging.info(f"Replaced {enriched} of {len(docs)} news stubs with full article text.")
+    return docs
+
+def collect_news_data_batch(competitor_names: List[str], days_back: int, pages: int = 1,
+                            max_workers: int = config.NEWS_API_MAX_WORKERS) -> Dict[str, List[Document]]:
+    """
+    Fetches news for several competitors concurrently (at most `max_workers` requests in flight).
+    Each unique article (by canonical URL) is cleaned once and attributed to every competitor it mentions,
+    plus the competitor whose query returned it. Returns a map of competitor name -> Documents.
+    """
+    names = list(dict.fromkeys(name.strip() for name in competitor_names if name and name.strip()))
+    results = {name: [] for name in names}
+    if not newsapi:
+        logging.error("NewsAPI client not initialized.")
+        return results
+    if not names:
+        logging.warning("No competitor names provided for batch news search.")
+        return results
+
+    start_date_str = utils.get_date_n_days_ago(days_back)
+    logging.info(f"Fetching news for {len(names)} competitors from {start_date_str} ({pages} page(s) each)...")
+
+    def fetch_competitor(name: str) -> List[Dict]:
+        params = _news_query_params(name, start_date_str, pages)
+        # Pages run sequentially per competitor so the outer pool alone bounds in-flight requests
+        return _fetch_news_pages(params, max(1, pages), max_workers=1)
+
+    with ratelimit.ContextThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names)))) as executor:
+        fetched = list(executor.map(fetch_competitor, names))
+
+    # Pool articles across competitors so overlapping stories are processed once
+    articles_by_url = {}
+    queried_by = {}
+    for name, articles in zip(names, fetched):
+        for article in articles:
+            url = urls.canonicalize_url(article.get('url') or '') or article.get('title') or ''
+            articles_by_url.setdefault(url, article)
+            queried_by.setdefault(url, set()).add(name)
+
+    # Whole-word matches only: "Intel" must not match "intelligence", nor "Meta" "metadata"
+    # (lookarounds rather than \b, so names ending in punctuation like "AT&T" or "C++" still match)
+    name_patterns = {name: re.compile(rf'(?<!\w){re.escape(name)}(?!\w)', re.IGNORECASE) for name in names}
+    contents = utils.clean_texts(a.get('content') or a.get('description') for a in articles_by_url.values())
+    for (url, article), content in zip(articles_by_url.items(), contents):
+        if not content:
+            continue
+        haystack = f"{article.get('title') or ''} {article.get('description') or ''} {content}"
+        for name in names:
+            if name in queried_by[url] or name_patterns[name].search(haystack):
+                results[name].append(Document(page_content=content, metadata=news_docs.article_metadata(article, name)))
+
+    logging.info(f"Batch news: {len(articles_by_url)} unique articles, "
+                 f"{sum(len(docs) for docs in results.values())} Documents across {len(names)} competitors.")
+    return results
+
 # --- ADD WEB SCRAPING FUNCTION ---
-def scrape_website_data(url: str) -> List[Document]:
-    """Scrapes text content from the main page of the given URL."""
+def scrape_website_data(url: str, crawl: bool = False, pending: state.PendingState = state.IMMEDIATE) -> List[Document]:
+    """
+    Scrapes text content from the main page of the given URL.
+    With crawl=True, crawls the same domain breadth-first from the URL instead (see crawler.crawl_website);
+    its sitemap marks are queued on `pending`.
+    """
     if not url:
         return []
+    if crawl:
+        logging.info(f"Crawling website: {url}")
+        return crawler.crawl_website(url, use_sitemap=config.CRAWL_USE_SITEMAP, pending=pending)
 
     logging.info(f"Attempting to scrape website: {url}")
     try:
-        # Using WebBaseLoader for simplicity. Handles fetching and basic parsing.
-        # It might fetch multiple documents if the page has distinct sections.
-        # Add headers to mimic a browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        loader = WebBaseLoader(
-            web_path=url,
-            header_template=headers,
-            # You might need requests_per_second for rate limiting on some sites later
-            # requests_per_second=1,
-            # requests_kwargs={'verify': False} # Use cautiously if facing SSL issues
-         )
-        # Load the data
-        web_docs = loader.load() # Returns a list of Documents
-
-        # Add/update metadata for clarity
-        fetch_date_str = datetime.now().strftime('%Y-%m-%d')
-        for doc in web_docs:
-            doc.metadata.setdefault('source', 'website') # Ensure source is set
-            doc.metadata['fetch_date'] = fetch_date_str
-            doc.metadata['url'] = url # Ensure original URL is stored
-
+        # Sends a conditional request (ETag / Last-Modified); an unchanged page (304)
+        # reuses the text extracted on the previous run instead of re-downloading it
+        web_docs = crawler.scrape_page(url)
         logging.info(f"Successfully scraped {len(web_docs)} document sections from {url}")
         return web_docs
     except Exception as e:
@@ -124,17 +447,17 @@ def retrieve_and_filter_context(vector_store, competitor_name: str, days_back: i
     query = f"Recent news and website information about {competitor_name}"
     logging.info(f"Retrieving context for query: '{query}'")
 
-    retrieved_docs = retriever.invoke(query)
+    retrieved_docs = ratelimit.call_with_retry("embeddings", retriever.invoke, query)
     logging.info(f"Retrieved {len(retrieved_docs)} documents initially (News + Web).")
 
     # --- Modified Filtering Step ---
-    # Filter only NEWS documents by publish date. Keep relevant web docs regardless of date.
+    # Filter only dated (NEWS and RSS) documents by publish date. Keep relevant web docs regardless of date.
     filtered_docs = db_retriever.filter_documents_by_date(
-        [doc for doc in retrieved_docs if doc.metadata.get('source') == 'newsapi'],
+        [doc for doc in retrieved_docs if doc.metadata.get('source') in db_retriever.DATED_SOURCES],
         start_date_str
     )
-    # Add back the web documents retrieved
-    web_docs = [doc for doc in retrieved_docs if doc.metadata.get('source') == 'website']
+    # Add back the web (and other undated source) documents retrieved
+    web_docs = [doc for doc in retrieved_docs if doc.metadata.get('source') not in db_retriever.DATED_SOURCES]
     filtered_docs.extend(web_docs)
     # -------------------------
 
@@ -142,6 +465,8 @@ def retrieve_and_filter_context(vector_store, competitor_name: str, days_back: i
     # Simple approach: just take the top N overall (similarity might mix sources)
     # More refined: ensure a mix if desired. Let's stick to simple top N for now.
     final_docs = filtered_docs[:7] # Take top 7 most relevant after filtering/combining
+    # Stay within the LLM context budget, using the token counts stored with each chunk
+    final_docs = chunking.fit_token_budget(final_docs)
     logging.info(f"Providing {len(final_docs)} documents as context after filtering/combining.")
     return final_docs
 
@@ -176,7 +501,7 @@ Concise Summary of Key Developments:
 
     logging.info(f"Generating summary for '{competitor_name}'...")
     try:
-        summary = summarization_chain.invoke({
+        summary = ratelimit.call_with_retry("llm", summarization_chain.invoke, {
             "competitor": competitor_name,
             "context": context_str
         })
@@ -7,6 +7,9 @@ import ui
 import agent
 import retriever as db_retriever
 import utils # Ensure utils logging is configured
+import ratelimit
+import sources
+import state
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -51,34 +54,52 @@ if generate_button:
             try:
                 # --- 1. Collect Data (News + Web) ---
                 logging.info(f"Button clicked. Starting analysis for '{competitor_name}', URL: '{competitor_url}', {days_back} days back.")
-
-                # Collect News Data
-                news_docs = agent.collect_news_data(competitor_name, days_back)
-                if not news_docs:
-                    ui.display_info(f"No recent news articles found for '{competitor_name}' via NewsAPI.")
-
-                # Collect Web Data (if URL provided)
-                web_docs = []
-                if competitor_url:
-                    # Optional: Add a small delay to avoid overwhelming sites/getting blocked
-                    # time.sleep(1)
-                    web_docs = agent.scrape_website_data(competitor_url)
-                    if not web_docs:
-                        ui.display_warning(f"Could not scrape or extract content from URL: {competitor_url}")
-                else:
+                ratelimit.new_retry_budget() # Per run, so concurrent sessions keep separate budgets
+
+                # Run all enabled sources in parallel; slow ones are dropped at their deadline.
+                # Sync marks/validators are only committed once the collected docs are stored.
+                pending = state.PendingState()
+                source_results = sources.collect_all(competitor_name, competitor_url, days_back, pending=pending)
+                for source_name, source_docs in source_results.items():
+                    if source_docs is None:
+                        ui.display_warning(f"Source '{source_name}' failed or did not respond in time and was skipped.")
+                news_docs = source_results.get("news") or []
+                web_docs = source_results.get("website") or []
+
+                if "news" in source_results and not news_docs:
+                    if config.NEWS_INCREMENTAL_SYNC:
+                        ui.display_info(f"No new news articles for '{competitor_name}' since the last sync.")
+                    else:
+                        ui.display_info(f"No recent news articles found for '{competitor_name}' via NewsAPI.")
+                if competitor_url and source_results.get("website") == []:
+                    ui.display_warning(f"Could not scrape or extract content from URL: {competitor_url}")
+                elif not competitor_url:
                     logging.info("No competitor URL provided, skipping web scraping.")
+                if web_docs:
+                    page_changes = db_retriever.classify_page_changes(web_docs)
+                    changed_pages = [url for url, status in page_changes.items() if status == 'changed']
+                    if changed_pages:
+                        ui.display_info(f"Website content changed since the last report on {len(changed_pages)} page(s).")
 
-                all_docs = news_docs + web_docs
+                all_docs = [doc for source_docs in source_results.values() if source_docs for doc in source_docs]
 
-                if not all_docs:
+                if not all_docs and not config.NEWS_INCREMENTAL_SYNC:
                      ui.display_error(f"No information found for '{competitor_name}' from any source.")
                      st.stop() # Stop if absolutely nothing was found
 
                 # --- 2. Process & Store Data ---
-                logging.info(f"Processing {len(all_docs)} documents ({len(news_docs)} news, {len(web_docs)} web).")
-                db_retriever.process_and_store_documents(all_docs, vector_store)
-                # Add a small delay after storage if needed, ChromaDB writing might take a moment
-                time.sleep(0.5)
+                # With incremental sync, earlier articles are already in the vector store
+                stored = True
+                if all_docs:
+                    logging.info(f"Processing {len(all_docs)} documents ({len(news_docs)} news, {len(web_docs)} web, "
+                                 f"{len(all_docs) - len(news_docs) - len(web_docs)} other).")
+                    stored = db_retriever.process_and_store_documents(all_docs, vector_store)
+                    # Add a small delay after storage if needed, ChromaDB writing might take a moment
+                    time.sleep(0.5)
+                if stored:
+                    pending.commit()
+                else:
+                    ui.display_warning("Storing the collected documents failed; they will be fetched again next time.")
 
                 # --- 3. Retrieve Relevant Context ---
                 logging.info("Retrieving combined context from vector store.")
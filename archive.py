@@ -0,0 +1,245 @@
+# archive.py
+"""
+Compressed, content-addressed archive of raw fetched data (page HTML, article HTML, NewsAPI JSON),
+so the index can be rebuilt offline after changing extraction or chunking settings.
+
+    python archive.py stats
+    python archive.py replay [--competitor NAME] [--kind html|newsapi] [--collection NAME] [--workers N]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import zstandard
+from langchain.schema import Document
+
+import config
+import http_client
+
+_lock = threading.Lock()
+_initialized = False
+
+
+def _connect() -> sqlite3.Connection:
+    global _initialized
+    os.makedirs(os.path.join(config.ARCHIVE_DIRECTORY, "objects"), exist_ok=True)
+    conn = sqlite3.connect(os.path.join(config.ARCHIVE_DIRECTORY, "index.sqlite3"), timeout=30)
+    if not _initialized:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "kind TEXT NOT NULL, url TEXT NOT NULL, competitor TEXT NOT NULL, fetched_at TEXT NOT NULL, "
+            "digest TEXT NOT NULL, meta TEXT NOT NULL, UNIQUE (kind, url, competitor, digest))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_records_url ON records (kind, url)")
+        _initialized = True
+    return conn
+
+
+def _object_path(digest: str) -> str:
+    return os.path.join(config.ARCHIVE_DIRECTORY, "objects", digest[:2], f"{digest}.zst")
+
+
+def store(kind: str, data: bytes, url: str = "", competitor: str = "", meta: Optional[Dict] = None) -> Optional[str]:
+    """
+    Archives raw bytes under their SHA-256 (identical content is stored once) and indexes them
+    by kind ('html', 'article', 'newsapi'), URL and competitor. Returns the digest, or None if disabled.
+    """
+    if not config.ARCHIVE_ENABLED or not data:
+        return None
+    digest = hashlib.sha256(data).hexdigest()
+    path = _object_path(digest)
+    try:
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = zstandard.ZstdCompressor(level=config.ARCHIVE_ZSTD_LEVEL).compress(data)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path) # Atomic, so readers never see a partial object
+        with _lock, _connect() as conn:
+            # Content seen again keeps one record, moved to the latest fetch: after X -> Y -> X
+            # (e.g. rotating homepage content) X, not Y, must be the newest version
+            conn.execute(
+                "INSERT INTO records (kind, url, competitor, fetched_at, digest, meta) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (kind, url, competitor, digest) DO UPDATE SET fetched_at = excluded.fetched_at, "
+                "meta = excluded.meta",
+                (kind, url or "", competitor or "", datetime.now().isoformat(timespec='seconds'), digest, json.dumps(meta or {})),
+            )
+    except OSError as e:
+        logging.warning(f"Could not archive {kind} for {url}: {e}")
+        return None
+    return digest
+
+
+def load(digest: str) -> bytes:
+    """Returns the raw bytes stored under `digest`."""
+    with open(_object_path(digest), 'rb') as f:
+        return zstandard.ZstdDecompressor().decompress(f.read())
+
+
+def iter_records(kind: Optional[str] = None, competitor: Optional[str] = None) -> Iterator[Dict]:
+    """Yields index records, newest first, optionally filtered by kind and competitor."""
+    query = "SELECT kind, url, competitor, fetched_at, digest, meta FROM records WHERE 1 = 1"
+    params = []
+    if kind:
+        query += " AND kind = ?"
+        params.append(kind)
+    if competitor:
+        query += " AND lower(competitor) = lower(?)"
+        params.append(competitor)
+    query += " ORDER BY fetched_at DESC"
+    with _connect() as conn:
+        rows = conn.execute(query, params).fetchall()
+    for kind_, url, competitor_, fetched_at, digest, meta in rows:
+        yield {"kind": kind_, "url": url, "competitor": competitor_, "fetched_at": fetched_at,
+               "digest": digest, "meta": json.loads(meta)}
+
+
+def _latest_record(kind: str, url: str) -> Optional[Tuple[str, Dict]]:
+    """(digest, meta) of the newest record of `kind` for `url`, or None."""
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT digest, meta FROM records WHERE kind = ? AND url = ? ORDER BY fetched_at DESC LIMIT 1", (kind, url)
+        ).fetchone()
+    return (row[0], json.loads(row[1])) if row else None
+
+
+def _decode(data: bytes, meta: Dict) -> str:
+    encoding = meta.get('encoding')
+    if not encoding or encoding == 'ISO-8859-1':
+        # Missing, or requests' default for text/* without a charset (records made before
+        # http_client.detect_encoding): honour <meta charset> or detect instead
+        encoding = http_client.detect_encoding(data)
+    return data.decode(encoding, errors='replace')
+
+
+def _rebuild_documents(record: Dict) -> List[Document]:
+    """
+    Re-runs cleaning/extraction for one archived record with the current settings.
+    Runs in a worker process; the pipeline modules are imported here to avoid circular imports.
+    """
+    import crawler
+    import extract
+    import news_docs
+    import utils
+
+    data = load(record['digest'])
+    if record['kind'] == 'html':
+        title, text, _ = crawler._parse_page(_decode(data, record['meta']), record['url'])
+        if not text:
+            return []
+        metadata = {
+            "source": "website",
+            "url": record['url'],
+            "title": title,
+            "fetch_date": record['fetched_at'][:10],
+            "text_fingerprint": extract.text_fingerprint(text),
+        }
+        return [Document(page_content=text, metadata=metadata)]
+
+    if record['kind'] == 'newsapi':
+        response = json.loads(data)
+        docs = news_docs.articles_to_docs(response.get('articles', []), record['competitor'])
+        if config.NEWS_FETCH_FULL_TEXT:
+            # Swap stubs for archived full article pages where we have them
+            for doc in docs:
+                article = _latest_record('article', doc.metadata.get('url', ''))
+                if not article:
+                    continue
+                digest, meta = article
+                html = _decode(load(digest), meta)
+                if config.HTML_EXTRACTOR == 'lxml':
+                    full_text = extract.extract_main_content(html)[1]
+                else:
+                    full_text = utils.clean_text(utils.extract_article_text(html))
+                if len(full_text) > len(doc.page_content):
+                    doc.page_content = full_text
+                    doc.metadata['full_text'] = True
+        return docs
+    return []
+
+
+def rebuild_documents(competitor: Optional[str] = None, kind: Optional[str] = None,
+                      workers: Optional[int] = None) -> List[Document]:
+    """
+    Rebuilds Documents from the archive without any network traffic, parsing records in a
+    process pool. Only the newest record per (source, URL) is kept. As in a live crawl, blocks
+    repeated across a site's pages are then dropped (lxml extractor only).
+    """
+    import extract
+
+    kinds = [kind] if kind else ['html', 'newsapi']
+    records = [r for k in kinds for r in iter_records(k, competitor)]
+    records.sort(key=lambda r: r['fetched_at'], reverse=True)
+    logging.info(f"Replaying {len(records)} archived records with {workers or os.cpu_count()} workers...")
+
+    docs = []
+    seen = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for record_docs in executor.map(_rebuild_documents, records, chunksize=16):
+            for doc in record_docs:
+                key = (doc.metadata.get('source'), doc.metadata.get('url'), doc.metadata.get('competitor'))
+                if key in seen:
+                    continue
+                seen.add(key)
+                docs.append(doc)
+
+    if config.HTML_EXTRACTOR == 'lxml':
+        pages_by_site: Dict[str, List[Document]] = {}
+        for doc in docs:
+            if doc.metadata.get('source') == 'website':
+                site = urlsplit(doc.metadata['url']).netloc.lower().removeprefix('www.')
+                pages_by_site.setdefault(site, []).append(doc)
+        kept = {id(doc) for pages in pages_by_site.values() for doc in extract.remove_repeated_blocks(pages)}
+        docs = [doc for doc in docs if doc.metadata.get('source') != 'website' or id(doc) in kept]
+    logging.info(f"Rebuilt {len(docs)} documents from the archive.")
+    return docs
+
+
+def replay(competitor: Optional[str] = None, kind: Optional[str] = None,
+           collection_name: str = config.VECTOR_DB_COLLECTION, workers: Optional[int] = None):
+    """Rebuilds documents from the archive and chunks/embeds/stores them into `collection_name`."""
+    import retriever as db_retriever
+
+    docs = rebuild_documents(competitor, kind, workers)
+    vector_store = db_retriever.get_vector_store(collection_name=collection_name)
+    # The target may be a fresh collection, so don't skip pages whose fingerprint is already known
+    db_retriever.process_and_store_documents(docs, vector_store, skip_unchanged=False)
+
+
+def _stats():
+    with _connect() as conn:
+        for kind, count, objects in conn.execute(
+            "SELECT kind, COUNT(*), COUNT(DISTINCT digest) FROM records GROUP BY kind"
+        ):
+            print(f"{kind:<10} {count:>8} records {objects:>8} objects")
+    size = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(os.path.join(config.ARCHIVE_DIRECTORY, "objects")) for name in names)
+    print(f"{'total':<10} {size / 1e6:>8.1f} MB compressed")
+
+
+if __name__ == '__main__':
+    import utils # Configures logging
+
+    parser = argparse.ArgumentParser(description="Raw data archive")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help="Show archive size per kind")
+    replay_parser = subparsers.add_parser('replay', help="Re-index the archive offline (no fetching)")
+    replay_parser.add_argument('--competitor', help="Only this competitor's NewsAPI records (pages aren't tied to one)")
+    replay_parser.add_argument('--kind', choices=['html', 'newsapi'])
+    replay_parser.add_argument('--collection', default=config.VECTOR_DB_COLLECTION)
+    replay_parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        _stats()
+    elif args.command == 'replay':
+        replay(args.competitor, args.kind, args.collection, args.workers)
@@ -0,0 +1,164 @@
+# benchmark.py
+"""
+Micro-benchmarks for the ingestion pipeline.
+
+    python benchmark.py extract page1.html https://www.example.com ...
+    python benchmark.py clean [--docs 20000] [file.txt ...]
+    python benchmark.py chunk [--docs 5000] [--workers N]
+"""
+import argparse
+import html
+import os
+import random
+import re
+import statistics
+import time
+import unicodedata
+from typing import Callable, List, Optional
+
+from bs4 import BeautifulSoup
+from langchain.schema import Document
+
+import chunking
+import extract
+import http_client
+import utils
+
+
+def _time_ms(fn: Callable, arg, repeat: int) -> float:
+    """Median wall time of fn(arg) in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _load_html(target: str) -> str:
+    if os.path.exists(target):
+        with open(target, encoding='utf-8', errors='replace') as f:
+            return f.read()
+    return http_client.fetch(target).text
+
+
+def _webbaseloader_text(html: str) -> str:
+    """What WebBaseLoader produces: html.parser over the whole page, every text node kept."""
+    return BeautifulSoup(html, 'html.parser').get_text()
+
+
+def _lxml_text(html: str) -> str:
+    return extract.extract_main_content(html)[1]
+
+
+def bench_extract(targets: List[str], repeat: int = 5):
+    """Compares parse time and output size per page: WebBaseLoader-style bs4 vs extract.py (lxml)."""
+    print(f"{'page':<40} {'bs4 ms':>8} {'bs4 chars':>10} {'lxml ms':>8} {'lxml chars':>10}")
+    for target in targets:
+        html = _load_html(target)
+        if not html:
+            print(f"{target[:40]:<40} (could not load)")
+            continue
+        row = []
+        for fn in (_webbaseloader_text, _lxml_text):
+            row.append(_time_ms(fn, html, repeat))
+            row.append(len(fn(html)))
+        print(f"{target[:40]:<40} {row[0]:>8.1f} {row[1]:>10} {row[2]:>8.1f} {row[3]:>10}")
+
+
+def _legacy_clean_text(text: str) -> str:
+    """The original utils.clean_text: two re.sub calls per document, patterns looked up in re's cache."""
+    if not text:
+        return ""
+    text = re.sub(r'\[\+\d+\s*chars\]', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _naive_clean_text(text: str) -> str:
+    """The legacy steps plus entity decoding, NFKC and zero-width removal, each run unconditionally."""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKC', html.unescape(text))
+    text = re.sub('[\u200b\u200c\u200d\u2060\u00ad\ufeff]', '', text)
+    return _legacy_clean_text(text)
+
+
+def _synthetic_texts(count: int) -> List[str]:
+    """NewsAPI/page-like snippets; some carry entities, NBSP/zero-width/full-width characters."""
+    rng = random.Random(0)
+    words = ["Acme", "launches", "new", "product", "revenue", "growth", "market", "Q3", "report", "partnership",
+             "the", "and", "of", "customers", "\n\n", "\t"]
+    specials = ["&amp;", "&#8217;s", "caf\u00e9", "\u00a0", "share\u200b", "\uff21\uff29"]
+    texts = []
+    for i in range(count):
+        tokens = [rng.choice(words) for _ in range(rng.randint(30, 400))]
+        if i % 4 == 0: # A quarter of the documents need the non-ASCII/entity steps
+            tokens += rng.sample(specials, 3)
+            rng.shuffle(tokens)
+        texts.append(" ".join(tokens) + f" [+{rng.randint(100, 9999)} chars]")
+    return texts
+
+
+def bench_clean(texts: List[str], repeat: int = 5):
+    """
+    Cleans a whole batch three ways: the legacy per-document clean_text, the same extended with
+    entity decoding/NFKC/zero-width removal done naively, and utils.clean_texts.
+    """
+    total_chars = sum(len(t) for t in texts)
+    print(f"{len(texts)} documents, {total_chars / 1e6:.1f}M chars")
+    rows = (
+        ("legacy clean_text", lambda batch: [_legacy_clean_text(t) for t in batch]),
+        ("naive full clean", lambda batch: [_naive_clean_text(t) for t in batch]),
+        ("clean_texts", utils.clean_texts),
+    )
+    for label, fn in rows:
+        ms = _time_ms(fn, texts, repeat)
+        print(f"{label:<20} {ms:>9.1f} ms {total_chars / 1e3 / max(ms, 1e-9):>8.1f} MB/s")
+
+
+def bench_chunk(doc_count: int, workers: Optional[int] = None, repeat: int = 3):
+    """
+    Times serial vs process-pool chunking on synthetic page-sized documents and checks that
+    both paths return the same chunks (text and metadata) in the same order.
+    """
+    docs = [Document(page_content=text * 8, metadata={"source": "website", "url": f"https://example.com/{i}"})
+            for i, text in enumerate(_synthetic_texts(doc_count))]
+    serial = chunking.split_documents(docs, workers=1)
+    parallel = chunking.split_documents(docs, workers=workers, parallel_min_docs=0)
+    identical = [(c.page_content, c.metadata) for c in serial] == [(c.page_content, c.metadata) for c in parallel]
+    print(f"{len(docs)} documents -> {len(serial)} chunks, parallel output identical: {identical}")
+    serial_ms = _time_ms(lambda batch: chunking.split_documents(batch, workers=1), docs, repeat)
+    parallel_ms = _time_ms(lambda batch: chunking.split_documents(batch, workers=workers, parallel_min_docs=0), docs, repeat)
+    print(f"{'serial':<20} {serial_ms:>9.1f} ms")
+    print(f"{'process pool':<20} {parallel_ms:>9.1f} ms ({workers or os.cpu_count()} workers)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ingestion pipeline micro-benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    extract_parser = subparsers.add_parser('extract', help="HTML text extraction: WebBaseLoader-style bs4 vs lxml")
+    extract_parser.add_argument('targets', nargs='+', help="HTML files or URLs")
+    extract_parser.add_argument('--repeat', type=int, default=5)
+    clean_parser = subparsers.add_parser('clean', help="Text cleaning: legacy clean_text vs batch clean_texts")
+    clean_parser.add_argument('files', nargs='*', help="Text files, one document per line (default: synthetic)")
+    clean_parser.add_argument('--docs', type=int, default=20000, help="Number of synthetic documents")
+    clean_parser.add_argument('--repeat', type=int, default=5)
+    chunk_parser = subparsers.add_parser('chunk', help="Chunking: serial vs process pool (and output parity)")
+    chunk_parser.add_argument('--docs', type=int, default=5000, help="Number of synthetic documents")
+    chunk_parser.add_argument('--workers', type=int)
+    chunk_parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == 'extract':
+        bench_extract(args.targets, args.repeat)
+    elif args.command == 'clean':
+        if args.files:
+            texts = []
+            for path in args.files:
+                with open(path, encoding='utf-8', errors='replace') as f:
+                    texts.extend(f.read().splitlines())
+        else:
+            texts = _synthetic_texts(args.docs)
+        bench_clean(texts, args.repeat)
+    elif args.command == 'chunk':
+        bench_chunk(args.docs, args.workers, args.repeat)
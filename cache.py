@@ -0,0 +1,121 @@
+# cache.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+import config
+
+
+class ResponseCache:
+    """
+    Small persistent key/value cache backed by SQLite.
+    - Entries expire after `ttl_seconds`.
+    - The store is bounded to `max_entries`; the least recently used entries are evicted first.
+    Safe to share between threads (one connection per operation, writes serialized by a lock).
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Builds a stable cache key from arbitrary JSON-serializable parts (e.g. request params)."""
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value, or None if missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return json.loads(row[0])
+            if row: # Expired
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """Stores a JSON-serializable value and evicts least recently used entries beyond max_entries."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        """Removes all entries."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+
+class CachedNewsApiClient:
+    """
+    Wraps a NewsApiClient so identical get_everything() requests are answered from a ResponseCache.
+    Only successful ('ok') responses are cached. Usable from the Streamlit app and headless scripts alike.
+    """
+
+    def __init__(self, client, cache: ResponseCache):
+        self.client = client
+        self.cache = cache
+
+    def get_everything(self, **params) -> dict:
+        key = ResponseCache.make_key("get_everything", params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logging.info(f"NewsAPI cache hit (hits={self.cache.hits}, misses={self.cache.misses}).")
+            return cached
+        logging.info(f"NewsAPI cache miss (hits={self.cache.hits}, misses={self.cache.misses}).")
+
+        response = self.client.get_everything(**params)
+        if response and response.get('status') == 'ok':
+            self.cache.set(key, response)
+        return response
+
+
+def get_news_cache(path: str = os.path.join(config.CACHE_DIRECTORY, "newsapi.sqlite3")) -> ResponseCache:
+    """Creates the NewsAPI response cache using the configured TTL and size bound."""
+    return ResponseCache(path, config.NEWS_CACHE_TTL_SECONDS, config.NEWS_CACHE_MAX_ENTRIES)
+
+
+def get_article_cache(path: str = os.path.join(config.CACHE_DIRECTORY, "articles.sqlite3")) -> ResponseCache:
+    """Creates the cache of extracted full article text, keyed by article URL."""
+    return ResponseCache(path, config.ARTICLE_CACHE_TTL_SECONDS, config.ARTICLE_CACHE_MAX_ENTRIES)
+
+
+def get_page_cache(path: str = os.path.join(config.CACHE_DIRECTORY, "pages.sqlite3")) -> ResponseCache:
+    """Creates the cache of scraped page validators and extracted text, keyed by page URL."""
+    return ResponseCache(path, config.PAGE_CACHE_TTL_SECONDS, config.PAGE_CACHE_MAX_ENTRIES)
+
+
+def get_robots_cache(path: str = os.path.join(config.CACHE_DIRECTORY, "robots.sqlite3")) -> ResponseCache:
+    """Creates the cache of fetched robots.txt files, keyed by site root."""
+    return ResponseCache(path, config.ROBOTS_CACHE_TTL_SECONDS, config.ROBOTS_CACHE_MAX_ENTRIES)
@@ -0,0 +1,119 @@
+# chunking.py
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import tiktoken
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+import config
+
+# Built once per process (the app process and each pool worker) and reused for every call
+_text_splitter: Optional[RecursiveCharacterTextSplitter] = None
+_encoding = None
+
+
+def get_encoding() -> Optional[tiktoken.Encoding]:
+    """The TOKEN_ENCODING tokenizer, or None if it can't be loaded (tiktoken downloads it on first use)."""
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding(config.TOKEN_ENCODING)
+        except Exception as e:
+            logging.error(f"Failed to load tiktoken encoding '{config.TOKEN_ENCODING}': {e}")
+            _encoding = False # Don't retry on every call
+    return _encoding or None
+
+
+def get_text_splitter() -> RecursiveCharacterTextSplitter:
+    global _text_splitter
+    if _text_splitter is None:
+        if config.CHUNK_MODE == 'tokens':
+            _text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+                encoding_name=config.TOKEN_ENCODING,
+                chunk_size=config.CHUNK_TOKEN_SIZE,
+                chunk_overlap=config.CHUNK_TOKEN_OVERLAP,
+                disallowed_special=(), # Scraped text may contain strings like '<|endoftext|>'
+            )
+        else:
+            _text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=config.CHUNK_SIZE,
+                chunk_overlap=config.CHUNK_OVERLAP,
+                length_function=len,
+            )
+    return _text_splitter
+
+
+def count_tokens(texts: List[str]) -> List[int]:
+    """
+    Token count of each text in the TOKEN_ENCODING encoding (special tokens are treated as plain text).
+    Falls back to an estimate of ~4 characters per token if the encoding is unavailable.
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        return [-(-len(text) // 4) for text in texts]
+    return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts)]
+
+
+def _split_batch(docs: List[Document]) -> List[Document]:
+    """
+    Splits a contiguous slice of documents, recording each chunk's position within its document
+    ('chunk_index') and token count. Runs in a worker process.
+    """
+    splitter = get_text_splitter()
+    chunks = []
+    for doc in docs:
+        doc_chunks = splitter.split_documents([doc])
+        for index, chunk in enumerate(doc_chunks):
+            chunk.metadata['chunk_index'] = index
+        chunks.extend(doc_chunks)
+    if get_encoding() is not None: # Only store exact counts
+        for chunk, token_count in zip(chunks, count_tokens([c.page_content for c in chunks])):
+            chunk.metadata['token_count'] = token_count
+    return chunks
+
+
+def fit_token_budget(docs: List[Document], max_tokens: int = config.CONTEXT_MAX_TOKENS) -> List[Document]:
+    """
+    Returns the leading documents whose combined size fits in `max_tokens`, using the 'token_count'
+    stored at ingest time (only chunks stored before token counts existed are tokenized here).
+    """
+    missing = [doc for doc in docs if 'token_count' not in doc.metadata]
+    counts = dict(zip(map(id, missing), count_tokens([doc.page_content for doc in missing])))
+    packed = []
+    total = 0
+    for doc in docs:
+        tokens = doc.metadata.get('token_count', counts.get(id(doc), 0))
+        if packed and total + tokens > max_tokens:
+            break
+        packed.append(doc)
+        total += tokens
+    return packed
+
+
+def split_documents(docs: List[Document], workers: Optional[int] = config.CHUNK_WORKERS,
+                    parallel_min_docs: int = config.CHUNK_PARALLEL_MIN_DOCS) -> List[Document]:
+    """
+    Splits documents into chunks (sized per CHUNK_MODE), preserving metadata and adding each
+    chunk's 'chunk_index' and 'token_count'. Ingests of at least `parallel_min_docs`
+    documents are split in a process pool (`workers` processes, default one per CPU); each worker
+    gets contiguous slices and results are concatenated in order, so the output is identical to
+    the serial path.
+    """
+    workers = workers or os.cpu_count() or 1
+    if len(docs) < parallel_min_docs or workers <= 1:
+        return _split_batch(docs)
+
+    # A few slices per worker evens out documents of very different lengths
+    slice_size = max(1, -(-len(docs) // (workers * 4)))
+    slices = [docs[i:i + slice_size] for i in range(0, len(docs), slice_size)]
+    logging.info(f"Splitting {len(docs)} documents in {workers} processes ({len(slices)} slices)...")
+    chunks = []
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context(config.PROCESS_START_METHOD)) as executor:
+        for slice_chunks in executor.map(_split_batch, slices):
+            chunks.extend(slice_chunks)
+    return chunks
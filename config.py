@@ -18,5 +18,116 @@ EMBEDDING_MODEL_NAME = "models/text-embedding-004"
 VECTOR_DB_DIRECTORY = "./data"
 VECTOR_DB_COLLECTION = "competitor_news"
 
+# Chunking (before embedding)
+CHUNK_MODE = 'characters' # 'tokens' sizes chunks in tiktoken tokens, in line with model token limits
+CHUNK_SIZE = 1000 # Characters per chunk
+CHUNK_OVERLAP = 200
+CHUNK_TOKEN_SIZE = 256 # Tokens per chunk in 'tokens' mode
+CHUNK_TOKEN_OVERLAP = 32
+TOKEN_ENCODING = 'cl100k_base' # tiktoken encoding for token-mode chunking and each chunk's 'token_count'
+CONTEXT_MAX_TOKENS = 6000 # Token budget of the context sent to the LLM (read from chunk metadata)
+CHUNK_PARALLEL_MIN_DOCS = 500 # Larger ingests (crawls, backfills) are split in a process pool
+CHUNK_WORKERS = None # Process pool size for chunking (None = number of CPUs)
+
+# Near-duplicate Chunk Suppression (syndicated stories: one chunk is embedded, the other URLs go in its metadata)
+NEARDUP_ENABLED = True
+NEARDUP_SOURCES = ['newsapi', 'rss'] # Sources whose chunks are compared (website pages track their own changes)
+NEARDUP_THRESHOLD = 0.8 # Estimated Jaccard similarity of word shingles at which chunks count as duplicates
+NEARDUP_SHINGLE_WORDS = 5 # Words per shingle
+NEARDUP_MIN_SHINGLES = 5 # Shorter chunks are never treated as duplicates
+NEARDUP_NUM_HASHES = 64 # MinHash signature length
+NEARDUP_BANDS = 16 # LSH bands (NUM_HASHES / BANDS rows each); more bands catch less similar candidates
+
+# Local Cache Configuration
+CACHE_DIRECTORY = "./cache"
+
 # NewsAPI Configuration
-NEWS_API_MAX_RESULTS = 20 # Max results to fetch per request
\ No newline at end of file
+NEWS_API_MAX_RESULTS = 20 # Max results to fetch per request
+NEWS_API_PAGE_SIZE = 100 # Page size used when fetching several pages (NewsAPI max is 100)
+NEWS_API_MAX_WORKERS = 4 # Max concurrent in-flight NewsAPI requests
+NEWS_CACHE_ENABLED = True # Answer repeated identical NewsAPI requests from the on-disk cache
+NEWS_CACHE_TTL_SECONDS = 3600 # How long a cached NewsAPI response stays valid
+NEWS_CACHE_MAX_ENTRIES = 500 # Least recently used responses are evicted beyond this
+NEWS_INCREMENTAL_SYNC = True # Only fetch articles newer than the last sync for each competitor
+NEWS_INCREMENTAL_MAX_PAGES = 5 # Newest-first pages walked back to the mark before falling back to a date backfill
+NEWS_SKIP_SEEN_URLS = True # Drop articles whose canonical URL was already ingested by an earlier run
+
+# Rate Limiting & Retries (shared by all outbound API calls in the process)
+RATE_LIMITS_PER_SECOND = {
+    "newsapi": 2.0,
+    "scrape": 2.0, # Per host
+    "embeddings": 5.0,
+    "llm": 1.0,
+}
+RETRY_MAX_ATTEMPTS = 4 # Attempts per call, including the first one
+RETRY_BASE_DELAY_SECONDS = 1.0 # Exponential backoff base (doubles per attempt)
+RETRY_MAX_DELAY_SECONDS = 30.0 # Upper bound for a single backoff (also caps Retry-After)
+RETRY_BUDGET_PER_REPORT = 20 # Total retries allowed across all calls of one report run
+EMBEDDING_BATCH_SIZE = 100 # Chunks embedded and stored per rate-limited call
+
+# HTTP Fetching (article bodies, website scraping)
+HTTP_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+HTTP_POOL_SIZE = 20 # Keep-alive connections kept per host in the shared session
+HTTP_MAX_PER_HOST = 4 # Max concurrent requests to a single host
+HTTP_TIMEOUT_SECONDS = 10 # Connect/read timeout per request
+HTTP_MAX_BODY_BYTES = 2_000_000 # Response bodies are cut off beyond this size
+HTTP_DEADLINE_SECONDS = 30 # Wall-clock limit for a whole request including the body download
+
+# Full-text Enrichment of NewsAPI articles (NewsAPI 'content' is truncated to ~200 chars)
+NEWS_FETCH_FULL_TEXT = False # Fetch each article URL and replace the stub with the full text
+ARTICLE_FETCH_MAX_WORKERS = 8 # Concurrent article downloads
+ARTICLE_CACHE_TTL_SECONDS = 7 * 24 * 3600 # Extracted article text is reused for a week
+ARTICLE_CACHE_MAX_ENTRIES = 5000
+
+# Data Sources (collected in parallel for each report)
+ENABLED_SOURCES = ["news", "website", "rss", "local_files"]
+COMPETITOR_FEEDS = { # Lower-case competitor name -> RSS/Atom feed URLs
+    # "google": ["https://blog.google/rss/"],
+}
+LOCAL_SOURCES_DIRECTORY = "./local_sources" # Per-competitor folders of .txt/.md notes
+SOURCE_DEFAULT_DEADLINE_SECONDS = 60
+SOURCE_DEADLINES_SECONDS = { # The report goes ahead without a source that misses its deadline
+    "news": 60,
+    "website": 30,
+    "rss": 20,
+    "local_files": 10,
+}
+
+# HTML Extraction: 'lxml' keeps main-content blocks and drops site chrome; 'bs4' keeps all page text
+HTML_EXTRACTOR = 'lxml'
+
+# Website Crawling (same-domain, breadth-first)
+WEBSITE_CRAWL_ENABLED = False # False: scrape only the URL entered; True: crawl the site from it
+CRAWL_MAX_DEPTH = 2 # Links away from the start page
+CRAWL_MAX_PAGES = 50 # Total pages per crawl
+CRAWL_MAX_WORKERS = 4 # Concurrent page fetches (also bounded by HTTP_MAX_PER_HOST)
+CRAWL_USE_SITEMAP = True # Crawl only pages whose sitemap lastmod changed since the last crawl (if the site has sitemaps)
+SITEMAP_MAX_FILES = 50 # Sitemap/index files read per crawl
+SITEMAP_MAX_BYTES = 20_000_000 # Sitemaps can be much larger than regular pages
+
+# Linked PDFs (press releases, investor decks) found while scraping/crawling
+PDF_ENABLED = True
+PDF_MAX_FILES = 10 # PDFs fetched per scrape/crawl
+PDF_MAX_BYTES = 20_000_000 # Larger PDFs are skipped (a truncated PDF can't be parsed)
+PDF_MAX_PAGES = 50 # Pages extracted per PDF
+PDF_PARSE_WORKERS = None # Process pool size for PDF parsing (None = number of CPUs)
+# Start method of process pools (PDF parsing, chunking). Not 'fork': pools are started from threads
+# (Streamlit, parallel sources), and forking a threaded process can deadlock. Use 'spawn' on Windows.
+PROCESS_START_METHOD = 'forkserver'
+
+# Crawl Politeness
+RESPECT_ROBOTS_TXT = True # Skip disallowed URLs and honour Crawl-delay / Request-rate
+CRAWL_MIN_DELAY_SECONDS = 0.0 # Minimum delay between requests to one host, even without a Crawl-delay
+ROBOTS_CACHE_TTL_SECONDS = 24 * 3600 # Parsed robots.txt rules are reused for a day
+ROBOTS_CACHE_MAX_ENTRIES = 1000
+PAGE_CACHE_TTL_SECONDS = 30 * 24 * 3600 # Validators + extracted text kept for conditional re-scrapes
+PAGE_CACHE_MAX_ENTRIES = 5000
+
+# URL De-duplication (canonical URLs: no tracking params/fragments/AMP variants, http == https)
+SEEN_URLS_CAPACITY = 1_000_000 # Expected number of URLs; sizes the in-memory Bloom filter (~1.2 MB)
+SEEN_URLS_ERROR_RATE = 0.01 # Bloom false-positive rate; false positives cost one SQLite lookup
+
+# Raw Data Archive (zstd-compressed, content-addressed; replay with `python archive.py replay`)
+ARCHIVE_ENABLED = True # Keep raw page HTML and NewsAPI JSON for offline re-indexing
+ARCHIVE_DIRECTORY = "./archive"
+ARCHIVE_ZSTD_LEVEL = 10
@@ -0,0 +1,327 @@
+# crawler.py
+import gzip
+import logging
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from bs4 import BeautifulSoup
+from langchain.schema import Document
+
+import config
+import archive
+import cache
+import extract
+import http_client
+import pdfs
+import politeness
+import state
+import urls
+import utils
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# Validators (ETag / Last-Modified) plus the extracted title/text/links of each fetched page
+page_cache = cache.get_page_cache()
+# Newest page lastmod of the last complete sitemap crawl of each host (prunes unchanged child sitemaps),
+# and the lastmod each page was fetched at (decides which pages changed)
+sitemap_crawls = state.StateStore("sitemap_crawls")
+sitemap_pages = state.StateStore("sitemap_pages")
+
+
+def _normalize_link(href: str, base_url: str) -> Optional[str]:
+    """Resolves a link against the page URL; returns None for non-HTTP links. Drops fragments."""
+    url = urljoin(base_url, href.strip())
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https'):
+        return None
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or '/', parts.query, ''))
+
+
+def _same_site(url: str, root_host: str) -> bool:
+    host = urlsplit(url).netloc.lower()
+    return host == root_host or host.removeprefix('www.') == root_host.removeprefix('www.')
+
+
+def _parse_page(html: str, page_url: str) -> Tuple[str, str, List[str]]:
+    """Returns (title, text, links) for an HTML page, using the extractor chosen in config.HTML_EXTRACTOR."""
+    if config.HTML_EXTRACTOR == 'lxml':
+        title, text, links = extract.extract_main_content(html)
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
+        links = [a['href'] for a in soup.find_all('a', href=True)]
+        for tag in soup(['script', 'style', 'noscript']):
+            tag.decompose()
+        title = soup.title.get_text(strip=True) if soup.title else 'N/A'
+        text = utils.clean_text(soup.get_text(' '))
+    normalized = [_normalize_link(href, page_url) for href in links]
+    return title, text, [link for link in normalized if link]
+
+
+def _fetch_page_outcome(url: str) -> Tuple[Optional[Document], List[str], bool]:
+    """
+    Fetches and parses one page. Returns (Document or None, outgoing links, settled), where settled
+    is True for a Document and for failures that retrying won't fix (4xx, unwanted content type,
+    no text), and False for network errors, 5xx and 408/429.
+    Revalidates against the page cache, so an unchanged page (HTTP 304) costs no body download or parse.
+    """
+    key = cache.ResponseCache.make_key("page", url)
+    cached = page_cache.get(key)
+    headers = {}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached.get('last_modified'):
+        headers['If-Modified-Since'] = cached['last_modified']
+
+    # Non-HTML responses (PDFs, images, bundles) are dropped from their headers, before the body is read
+    result = http_client.fetch(url, headers=headers, content_types=HTML_CONTENT_TYPES)
+    not_modified = result.status == 304 and cached is not None
+    if not_modified:
+        logging.info(f"Page unchanged since last fetch (304): {url}")
+        title, text, links = cached['title'], cached['text'], cached['links']
+        truncation_reason = cached.get('truncation_reason')
+    elif not result.ok:
+        settled = result.status is not None and result.status < 500 and result.status not in (408, 429)
+        return None, [], settled
+    else:
+        truncation_reason = result.truncation_reason
+        archive.store('html', result.body, url=url, meta={"encoding": result.encoding, "truncation_reason": truncation_reason})
+        title, text, links = _parse_page(result.text, url)
+        etag, last_modified = result.headers.get('ETag'), result.headers.get('Last-Modified')
+        if etag or last_modified: # Pages without validators can't be revalidated, don't keep them
+            page_cache.set(key, {
+                "etag": etag,
+                "last_modified": last_modified,
+                "title": title,
+                "text": text,
+                "links": links,
+                "truncation_reason": truncation_reason,
+            })
+
+    if not text:
+        return None, links, True
+    metadata = {
+        "source": "website",
+        "url": url,
+        "title": title,
+        "fetch_date": datetime.now().strftime('%Y-%m-%d'),
+        "not_modified": not_modified,
+        "truncated": truncation_reason is not None,
+        "text_fingerprint": extract.text_fingerprint(text),
+    }
+    if truncation_reason:
+        metadata['truncation_reason'] = truncation_reason # 'size' or 'deadline'
+    return Document(page_content=text, metadata=metadata), links, True
+
+
+def _fetch_page(url: str) -> Tuple[Optional[Document], List[str]]:
+    """Fetches and parses one page. Returns (Document or None, outgoing links); see _fetch_page_outcome."""
+    doc, links, _ = _fetch_page_outcome(url)
+    return doc, links
+
+
+def _same_site_pdfs(links: List[str], page_url: str) -> List[str]:
+    root_host = urlsplit(page_url).netloc.lower()
+    return [link for link in links if pdfs.is_pdf_link(link) and _same_site(link, root_host)]
+
+
+def scrape_page(url: str) -> List[Document]:
+    """
+    Fetches a single page (with cache revalidation) and returns it as a Document list, followed by
+    the pages of same-site PDFs it links to (when config.PDF_ENABLED).
+    """
+    doc, links = _fetch_page(url)
+    docs = [doc] if doc else []
+    if config.PDF_ENABLED:
+        docs.extend(pdfs.collect_pdf_documents(_same_site_pdfs(links, url)))
+    return docs
+
+
+def _discover_sitemaps(site_url: str) -> List[str]:
+    """Returns the sitemap URLs declared in (cached) robots.txt, falling back to /sitemap.xml."""
+    parts = urlsplit(site_url)
+    return politeness.sitemaps(site_url) or [f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
+
+
+def _parse_sitemap(data: bytes) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Parses a sitemap or sitemap index (optionally gzipped).
+    Returns (child sitemaps, page URLs) as dicts with 'loc', 'lastmod' and, for pages, 'priority'.
+    """
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    root = ET.fromstring(data)
+    children = [{
+        "loc": (el.findtext(f'{SITEMAP_NS}loc') or '').strip(),
+        "lastmod": utils.parse_date_utc(el.findtext(f'{SITEMAP_NS}lastmod')),
+    } for el in root.iter(f'{SITEMAP_NS}sitemap')]
+    pages = []
+    for el in root.iter(f'{SITEMAP_NS}url'):
+        try:
+            priority = float(el.findtext(f'{SITEMAP_NS}priority') or 0.5)
+        except ValueError:
+            priority = 0.5
+        pages.append({
+            "loc": (el.findtext(f'{SITEMAP_NS}loc') or '').strip(),
+            "lastmod": utils.parse_date_utc(el.findtext(f'{SITEMAP_NS}lastmod')),
+            "priority": priority,
+        })
+    return [c for c in children if c['loc']], [p for p in pages if p['loc']]
+
+
+def _sitemap_urls(site_url: str, since: Optional[datetime]) -> Optional[List[Dict]]:
+    """
+    Walks robots.txt sitemaps (including nested indexes) and returns their same-site pages.
+    Returns None if no sitemap was found. Child sitemaps whose own lastmod is more than a day older
+    than `since` are not downloaded at all (the day of slack covers date-only lastmods).
+    """
+    prune_before = since - timedelta(days=1) if since else None
+    root_host = urlsplit(site_url).netloc.lower()
+    queue = _discover_sitemaps(site_url)
+    visited = set()
+    found_any = False
+    pages = {}
+    while queue and len(visited) < config.SITEMAP_MAX_FILES:
+        sitemap_url = queue.pop(0)
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+        result = http_client.fetch(sitemap_url, max_bytes=config.SITEMAP_MAX_BYTES)
+        if not result.ok:
+            continue
+        try:
+            children, entries = _parse_sitemap(result.body)
+        except (ET.ParseError, OSError, EOFError) as e:
+            logging.warning(f"Could not parse sitemap {sitemap_url}: {e}")
+            continue
+        found_any = True
+        queue.extend(c['loc'] for c in children if not (prune_before and c['lastmod'] and c['lastmod'] < prune_before))
+        for entry in entries:
+            url = _normalize_link(entry['loc'], sitemap_url)
+            if not url or not _same_site(url, root_host):
+                continue
+            pages.setdefault(urls.canonicalize_url(url), {**entry, "loc": url})
+    return list(pages.values()) if found_any else None
+
+
+def crawl_sitemap(site_url: str, max_pages: int = config.CRAWL_MAX_PAGES, max_workers: int = config.CRAWL_MAX_WORKERS,
+                  pending: state.PendingState = state.IMMEDIATE) -> Optional[List[Document]]:
+    """
+    Incremental crawl driven by the site's sitemaps: only pages whose lastmod differs from the one
+    they were last fetched at are fetched, highest priority (then most recent) first,
+    at most `max_pages` per run. Returns None if the site has no usable sitemap.
+    The per-page and per-host marks are queued on `pending` (commit once the Documents are stored).
+    """
+    host = urlsplit(site_url).netloc.lower()
+    last_crawl = utils.parse_date_utc(sitemap_crawls.get(host))
+    pages = _sitemap_urls(site_url, last_crawl)
+    if pages is None:
+        logging.info(f"No sitemap found for {host}.")
+        return None
+
+    def lastmod_key(page: Dict) -> str:
+        return page['lastmod'].strftime('%Y-%m-%dT%H:%M:%SZ') if page['lastmod'] else 'N/A'
+
+    # Pages already fetched at this lastmod (pages without one are only taken on the first crawl)
+    newest = max((p['lastmod'] for p in pages if p['lastmod']), default=None)
+    fetched_at = sitemap_pages.get_many(p['loc'] for p in pages)
+    pages = [p for p in pages if fetched_at.get(p['loc']) != lastmod_key(p)]
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+    pages.sort(key=lambda p: (p['priority'], p['lastmod'] or epoch), reverse=True)
+    # Disallowed pages are never fetched, so they must not hold back the host mark either
+    pages = [p for p in pages if politeness.can_fetch(p['loc'])]
+    if not config.PDF_ENABLED:
+        pages = [p for p in pages if not pdfs.is_pdf_link(p['loc'])]
+    selected = pages[:max_pages]
+    logging.info(f"Sitemap delta for {host}: {len(pages)} new or changed page(s), "
+                 f"fetching {len(selected)}.")
+
+    pdf_pages = [p for p in selected if pdfs.is_pdf_link(p['loc'])]
+    selected = [p for p in selected if not pdfs.is_pdf_link(p['loc'])]
+    results = politeness.polite_map(_fetch_page_outcome, [p['loc'] for p in selected], max_workers)
+    docs = []
+    recorded = 0 # Pages marked at their lastmod; transient failures are retried next run
+    for page, (doc, _, settled) in zip(selected, (r or (None, [], False) for r in results)):
+        if doc:
+            if page['lastmod']:
+                doc.metadata['lastmod'] = lastmod_key(page)
+            docs.append(doc)
+        if settled:
+            # Pages that failed for good (404, not HTML, no text) are marked too, so they don't
+            # take the page budget again until their lastmod changes
+            pending.set(sitemap_pages, page['loc'], lastmod_key(page))
+            recorded += 1
+    if config.HTML_EXTRACTOR == 'lxml':
+        docs = extract.remove_repeated_blocks(docs)
+    if pdf_pages:
+        pdf_docs = pdfs.collect_pdf_documents([p['loc'] for p in pdf_pages], max_files=len(pdf_pages))
+        parsed_urls = {doc.metadata['url'] for doc in pdf_docs}
+        for page in pdf_pages:
+            if page['loc'] in parsed_urls:
+                pending.set(sitemap_pages, page['loc'], lastmod_key(page))
+                recorded += 1
+        docs.extend(pdf_docs)
+
+    if recorded == len(pages) and newest:
+        # Only advance the host mark once the whole delta is fetched; the rest comes next run
+        pending.set(sitemap_crawls, host, newest.isoformat())
+    return docs
+
+
+def crawl_website(start_url: str, max_depth: int = config.CRAWL_MAX_DEPTH, max_pages: int = config.CRAWL_MAX_PAGES,
+                  max_workers: int = config.CRAWL_MAX_WORKERS, use_sitemap: bool = False,
+                  pending: state.PendingState = state.IMMEDIATE) -> List[Document]:
+    """
+    Breadth-first crawl of the start URL's site (same host, www. ignored), up to `max_depth`
+    links away and `max_pages` pages in total. Pages are fetched concurrently over the shared
+    keep-alive pool in http_client; returns one Document per page in discovery order.
+    With use_sitemap=True, sites that publish a sitemap get an incremental crawl_sitemap() instead.
+    """
+    start_url = _normalize_link(start_url, start_url)
+    if not start_url:
+        return []
+    if use_sitemap:
+        docs = crawl_sitemap(start_url, max_pages=max_pages, max_workers=max_workers, pending=pending)
+        if docs is not None:
+            return docs
+    root_host = urlsplit(start_url).netloc
+
+    # Keyed by canonical URL, so tracking-param/fragment/AMP/http(s) variants of a page are fetched once
+    seen = {urls.canonicalize_url(start_url)}
+    pdf_links = []
+    docs = []
+    frontier = [start_url] if politeness.can_fetch(start_url) else []
+    # Level by level, so the page budget is always spent on shallower pages first
+    for depth in range(max_depth + 1):
+        if not frontier:
+            break
+        next_frontier = []
+        # polite_map() enforces per-host limits/crawl-delay and keeps each level in discovery order
+        for result in politeness.polite_map(_fetch_page, frontier, max_workers):
+            doc, links = result or (None, [])
+            if doc:
+                doc.metadata['depth'] = depth
+                docs.append(doc)
+            if depth >= max_depth:
+                continue
+            for link in links:
+                if len(seen) >= max_pages:
+                    break
+                key = urls.canonicalize_url(link)
+                if key in seen or not _same_site(link, root_host):
+                    continue
+                seen.add(key)
+                if pdfs.is_pdf_link(link):
+                    pdf_links.append(link) # Parsed separately below, in a process pool
+                elif politeness.can_fetch(link):
+                    next_frontier.append(link)
+        frontier = next_frontier
+
+    if config.HTML_EXTRACTOR == 'lxml':
+        docs = extract.remove_repeated_blocks(docs)
+    if config.PDF_ENABLED:
+        docs.extend(pdfs.collect_pdf_documents(pdf_links))
+    logging.info(f"Crawled {len(docs)} pages from {start_url} ({len(seen)} URLs visited, depth <= {max_depth}).")
+    return docs
@@ -0,0 +1,155 @@
+# extract.py
+import hashlib
+import re
+from collections import Counter
+from typing import List, Set, Tuple
+
+from langchain.schema import Document
+from lxml import etree
+from lxml import html as lxml_html
+
+# Elements that never hold main content
+CHROME_TAGS = ['script', 'style', 'noscript', 'template', 'nav', 'header', 'footer', 'aside',
+               'form', 'iframe', 'svg', 'button', 'select']
+# class/id/role values typical of menus, banners and other site chrome
+CHROME_ATTR_RE = re.compile(
+    r'(^|[\s_-])(nav|navbar|navigation|menu|footer|header|sidebar|cookies?|consent|gdpr|banner|'
+    r'breadcrumbs?|social|share|sharing|newsletter|subscribe|popup|modal|advert|ads?|promo)([\s_-]|$)',
+    re.IGNORECASE,
+)
+# Text-bearing block elements; each block's own text is emitted once, apart from its child blocks' text
+BLOCK_TAGS = ('p', 'div', 'section', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'blockquote', 'pre',
+              'td', 'th', 'dd', 'dt', 'figcaption')
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+MIN_BLOCK_CHARS = 25 # Shorter non-heading blocks are usually labels, buttons or menu items
+MAX_LINK_DENSITY = 0.5 # Blocks that are mostly link text are navigation
+MAX_CHROME_SHARE = 0.5 # A chrome-looking class on an element holding more of the main text marks a wrapper
+
+
+def _main_container(tree):
+    """Prefers <article>/<main>/role=main when present, otherwise the whole body."""
+    for xpath in ('//article', '//main', '//*[@role="main"]'):
+        candidates = tree.xpath(xpath)
+        if candidates:
+            return max(candidates, key=lambda el: len(el.text_content()))
+    body = tree.find('body')
+    return body if body is not None else tree
+
+
+def _drop_chrome(tree, main):
+    """
+    Drops site chrome by tag and by class/id/role, sparing the main container and its ancestors,
+    <header>/<footer> inside an article (its headline and byline), and class-matched elements that
+    hold most of the main text (layout wrappers like "site-wrapper has-sidebar").
+    """
+    protected = {main, *main.iterancestors()}
+    for el in tree.xpath('|'.join(f'//{tag}' for tag in CHROME_TAGS)):
+        if el in protected:
+            continue
+        if el.tag in ('header', 'footer') and next(el.iterancestors('article', 'main'), None) is not None:
+            continue
+        el.drop_tree()
+    main_chars = len(main.text_content())
+    for el in tree.xpath('//*[@class or @id or @role]'):
+        if el in protected or el.tag in ('main', 'article'):
+            continue
+        attrs = f"{el.get('class', '')} {el.get('id', '')} {el.get('role', '')}"
+        if CHROME_ATTR_RE.search(attrs) and len(el.text_content()) <= main_chars * MAX_CHROME_SHARE:
+            el.drop_tree()
+
+
+def _link_chars(el) -> int:
+    return sum(len(' '.join(a.text_content().split())) for a in el.iter('a'))
+
+
+def _text_blocks(container) -> List[Tuple[str, str, int]]:
+    """
+    (tag, text, link characters) of each text block under the container, in document order:
+    the innermost block elements, plus text sitting directly inside outer blocks (before, between
+    or after their child blocks). Nothing is counted twice.
+    """
+    blocks = [el for el in container.iter(*BLOCK_TAGS) if el is not container]
+    outer: Set = set()
+    for el in blocks:
+        parent = el.getparent()
+        while parent is not None and parent is not container and parent not in outer:
+            outer.add(parent)
+            parent = parent.getparent()
+    leaves = set(blocks) - outer
+    found = []
+
+    def visit(el):
+        parts, link_chars = [el.text or ''], 0
+        for child in el:
+            if child in outer or child in leaves:
+                found.append((el.tag, ''.join(parts), link_chars))
+                if child in outer:
+                    visit(child)
+                else:
+                    found.append((child.tag, child.text_content(), _link_chars(child)))
+                parts, link_chars = [], 0
+            elif isinstance(child.tag, str): # Inline element; comments only contribute their tail
+                parts.append(child.text_content())
+                link_chars += _link_chars(child)
+            parts.append(child.tail or '')
+        found.append((el.tag, ''.join(parts), link_chars))
+
+    visit(container)
+    return [(tag, ' '.join(text.split()), link_chars) for tag, text, link_chars in found if text and not text.isspace()]
+
+
+def extract_main_content(html: str) -> Tuple[str, str, List[str]]:
+    """
+    Extracts (title, main text, raw link hrefs) from an HTML page with lxml.
+    Site chrome (nav/header/footer/cookie banners...) is dropped by tag and class/id, and
+    text blocks are kept only if they are long enough and not dominated by link text.
+    Kept blocks are separated by newlines.
+    """
+    if not html or not html.strip():
+        return 'N/A', '', []
+    try:
+        # Encode first: lxml rejects str input that carries an XML encoding declaration
+        tree = lxml_html.fromstring(html.encode('utf-8'), parser=lxml_html.HTMLParser(encoding='utf-8'))
+    except (etree.ParserError, ValueError):
+        return 'N/A', '', []
+
+    title = ' '.join((tree.findtext('.//title') or '').split()) or 'N/A'
+    links = [str(href) for href in tree.xpath('//a/@href')]
+    main = _main_container(tree)
+    _drop_chrome(tree, main)
+
+    lines = []
+    for tag, text, link_chars in _text_blocks(main):
+        if tag not in HEADING_TAGS and len(text) < MIN_BLOCK_CHARS:
+            continue
+        if link_chars / len(text) > MAX_LINK_DENSITY:
+            continue
+        lines.append(text)
+    return title, '\n'.join(lines), links
+
+
+def text_fingerprint(text: str) -> str:
+    """
+    Fingerprint of a page's extracted text, taken before remove_repeated_blocks: what that drops
+    depends on which other pages were fetched in the same batch, so the final text isn't stable.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def remove_repeated_blocks(docs: List[Document], min_share: float = 0.5, min_pages: int = 3) -> List[Document]:
+    """
+    Drops text blocks (lines) that appear on at least `min_share` of the given pages of one site,
+    i.e. chrome that survived extraction (repeated taglines, footers without markup hints).
+    Only applied when there are at least `min_pages` pages to compare. The result depends on the
+    batch, so change detection uses each page's 'text_fingerprint' metadata instead.
+    """
+    if len(docs) < min_pages:
+        return docs
+    counts = Counter(line for doc in docs for line in set(doc.page_content.split('\n')))
+    threshold = max(2, int(len(docs) * min_share))
+    repeated = {line for line, count in counts.items() if count >= threshold}
+    if not repeated:
+        return docs
+    for doc in docs:
+        doc.page_content = '\n'.join(line for line in doc.page_content.split('\n') if line not in repeated)
+    return [doc for doc in docs if doc.page_content.strip()]
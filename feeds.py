@@ -0,0 +1,105 @@
+# feeds.py
+import logging
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from langchain.schema import Document
+
+import http_client
+import state
+import utils
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+CONTENT_NS = "{http://purl.org/rss/1.0/modules/content/}"
+
+# ETag / Last-Modified of each feed, so unchanged feeds cost a 304 and nothing downstream
+feed_validators = state.StateStore("feed_validators")
+
+
+def _text(element: Optional[ET.Element]) -> str:
+    return (element.text or "").strip() if element is not None else ""
+
+
+def parse_feed(xml_data: bytes) -> List[Dict]:
+    """
+    Parses an RSS 2.0 or Atom feed into a list of entries with keys
+    'title', 'url', 'content' (raw HTML/text) and 'published' (datetime or None).
+    """
+    root = ET.fromstring(xml_data) # Bytes, so the parser honours the declared encoding
+    entries = []
+    for item in root.iter('item'): # RSS 2.0
+        entries.append({
+            "title": _text(item.find('title')),
+            "url": _text(item.find('link')),
+            "content": _text(item.find(f'{CONTENT_NS}encoded')) or _text(item.find('description')),
+            "published": utils.parse_date_utc(_text(item.find('pubDate'))),
+        })
+    for entry in root.iter(f'{ATOM_NS}entry'): # Atom
+        link = entry.find(f"{ATOM_NS}link[@rel='alternate']")
+        if link is None:
+            link = entry.find(f'{ATOM_NS}link')
+        entries.append({
+            "title": _text(entry.find(f'{ATOM_NS}title')),
+            "url": link.get('href', '') if link is not None else '',
+            "content": _text(entry.find(f'{ATOM_NS}content')) or _text(entry.find(f'{ATOM_NS}summary')),
+            "published": utils.parse_date_utc(_text(entry.find(f'{ATOM_NS}published')) or _text(entry.find(f'{ATOM_NS}updated'))),
+        })
+    return entries
+
+
+def collect_feed_data(feed_url: str, competitor_name: str, days_back: int,
+                      pending: state.PendingState = state.IMMEDIATE) -> List[Document]:
+    """
+    Fetches an RSS/Atom feed with a conditional GET and returns entries from the last N days as
+    Documents with the same metadata schema as agent.collect_news_data (source='rss').
+    Returns an empty list when the feed is unchanged since the last fetch (HTTP 304).
+    The feed's new validators are queued on `pending`: commit it once the Documents are stored,
+    or the next fetch may get a 304 for entries that were never ingested.
+    """
+    validators = feed_validators.get(feed_url, {})
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+
+    result = http_client.fetch(feed_url, headers=headers)
+    if result.status == 304:
+        logging.info(f"Feed unchanged since last fetch (304): {feed_url}")
+        return []
+    if not result.ok:
+        logging.warning(f"Could not fetch feed {feed_url}: {result.error or result.status}")
+        return []
+
+    try:
+        entries = parse_feed(result.body)
+    except ET.ParseError as e:
+        logging.error(f"Error parsing feed {feed_url}: {e}")
+        return []
+
+    start_date = datetime.strptime(utils.get_date_n_days_ago(days_back), '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    docs = []
+    for entry in entries:
+        if entry['published'] and entry['published'] < start_date:
+            continue
+        content = utils.clean_text(BeautifulSoup(entry['content'], 'html.parser').get_text(' '))
+        if not content:
+            continue
+        metadata = {
+            "source": "rss",
+            "competitor": competitor_name,
+            "title": entry['title'] or 'N/A',
+            "url": entry['url'] or 'N/A',
+            "publish_date": entry['published'].strftime('%Y-%m-%dT%H:%M:%SZ') if entry['published'] else 'N/A',
+        }
+        docs.append(Document(page_content=content, metadata=metadata))
+
+    # Only remember validators once the body has been processed (and, via `pending`, stored)
+    pending.set(feed_validators, feed_url, {
+        "etag": result.headers.get('ETag'),
+        "last_modified": result.headers.get('Last-Modified'),
+    })
+    logging.info(f"Created {len(docs)} Document objects from feed {feed_url} ({len(entries)} entries).")
+    return docs
@@ -0,0 +1,193 @@
+# http_client.py
+import codecs
+import logging
+import re
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+import config
+import ratelimit
+
+
+@dataclass
+class FetchResult:
+    """Outcome of a single HTTP GET. `body` holds at most config.HTTP_MAX_BODY_BYTES bytes."""
+    url: str
+    status: Optional[int] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    encoding: Optional[str] = None # Declared charset, else <meta charset>, else detected (see detect_encoding)
+    truncated: bool = False # Body was cut short, see truncation_reason
+    truncation_reason: Optional[str] = None # 'size' (byte cap) or 'deadline' (wall-clock limit)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and 200 <= self.status < 300
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+
+_CHARSET_HEADER_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+# <meta charset="...">, <meta http-equiv="Content-Type" content="...; charset=..."> and <?xml encoding="..."?>
+_CHARSET_DECLARATION_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)|<\?xml[^>]+encoding\s*=\s*["\']([\w.:-]+)',
+                                     re.IGNORECASE)
+
+
+def _known_encoding(name) -> Optional[str]:
+    if isinstance(name, bytes):
+        name = name.decode('ascii', errors='ignore')
+    try:
+        return codecs.lookup(name).name if name else None
+    except LookupError:
+        return None
+
+
+def detect_encoding(body: bytes, content_type: str = '') -> str:
+    """
+    Charset of a response body: the Content-Type charset parameter, else a BOM or an in-document
+    declaration (<meta charset>, XML encoding) near the start, else detected from the bytes.
+    Unlike requests, a text/* type without a charset does not mean ISO-8859-1.
+    """
+    match = _CHARSET_HEADER_RE.search(content_type or '')
+    encoding = _known_encoding(match.group(1)) if match else None
+    if encoding:
+        return encoding
+    if body.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    match = _CHARSET_DECLARATION_RE.search(body[:4096])
+    encoding = _known_encoding(match.group(1) or match.group(2)) if match else None
+    if encoding:
+        return encoding
+    return _known_encoding(requests.compat.chardet.detect(body[:65536])['encoding']) or 'utf-8'
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide keep-alive session shared by all scraping/fetching code."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=config.HTTP_POOL_SIZE, pool_maxsize=config.HTTP_POOL_SIZE)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+            _session.headers['User-Agent'] = config.HTTP_USER_AGENT
+        return _session
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    """Per-host semaphore limiting concurrent requests to one site."""
+    host = urlsplit(url).netloc.lower()
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(config.HTTP_MAX_PER_HOST)
+        return _host_slots[host]
+
+
+def _response_socket(response: requests.Response) -> Optional[socket.socket]:
+    """
+    The socket the body is read from, taken from the underlying http.client response: urllib3
+    already detaches it from the connection for HTTP/1.0 and `Connection: close` responses.
+    """
+    fp = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+    return getattr(getattr(fp, 'raw', None), '_sock', None)
+
+
+def _read_capped(response: requests.Response, max_bytes: int, deadline: float) -> Tuple[bytes, Optional[str]]:
+    """
+    Streams the body, stopping once `max_bytes` have been read or the monotonic `deadline` has passed.
+    Reads return whatever has arrived (read1) and the socket timeout is cut to the time left, so
+    a slow or stalled server can't hold the read past the deadline and no received bytes are lost.
+    Returns (body, truncation reason or None).
+    """
+    sock = _response_socket(response)
+    original_timeout = sock.gettimeout() if sock is not None else None
+    chunks = []
+    size = 0
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return b"".join(chunks), 'deadline'
+            if sock is not None and sock.fileno() != -1: # Closed once the whole body is in
+                sock.settimeout(min(remaining, original_timeout or remaining))
+            chunk = response.raw.read1(16384, decode_content=True)
+            if not chunk:
+                return b"".join(chunks), None
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                return b"".join(chunks)[:max_bytes], 'size'
+    except (requests.RequestException, urllib3.exceptions.HTTPError, OSError):
+        if deadline - time.monotonic() > 0.05: # Socket timeouts may fire a hair early
+            raise # A genuine connection error or read timeout, not the deadline
+        return b"".join(chunks), 'deadline'
+    finally:
+        if sock is not None and sock.fileno() != -1:
+            sock.settimeout(original_timeout) # The connection may go back to the pool
+
+
+def _get(url: str, headers: Optional[Dict[str, str]], max_bytes: int, timeout: float,
+         deadline_seconds: float, content_types: Optional[Tuple[str, ...]]) -> FetchResult:
+    with _host_slot(url):
+        deadline = time.monotonic() + deadline_seconds
+        response = get_session().get(url, headers=headers, timeout=timeout, stream=True)
+        try:
+            if response.status_code == 429 or response.status_code >= 500:
+                response.raise_for_status() # Let call_with_retry back off and retry
+            content_type = response.headers.get('Content-Type', '').lower()
+            if content_types and response.status_code == 200 and content_type and not any(t in content_type for t in content_types):
+                # Decided from the headers alone: the body is never downloaded
+                logging.info(f"Skipping {url}: content type '{content_type}' not wanted.")
+                return FetchResult(url=url, status=response.status_code, headers=response.headers,
+                                   error=f"Skipped content type '{content_type}'")
+            body, truncation_reason = _read_capped(response, max_bytes, deadline)
+        finally:
+            response.close()
+    if truncation_reason:
+        logging.warning(f"Body of {url} truncated at {len(body)} bytes ({truncation_reason} limit).")
+    return FetchResult(
+        url=url,
+        status=response.status_code,
+        headers=response.headers, # Case-insensitive
+        body=body,
+        encoding=detect_encoding(body, response.headers.get('Content-Type', '')),
+        truncated=truncation_reason is not None,
+        truncation_reason=truncation_reason,
+    )
+
+
+def fetch(url: str, headers: Optional[Dict[str, str]] = None,
+          max_bytes: int = config.HTTP_MAX_BODY_BYTES, timeout: float = config.HTTP_TIMEOUT_SECONDS,
+          deadline_seconds: float = config.HTTP_DEADLINE_SECONDS,
+          content_types: Optional[Tuple[str, ...]] = None) -> FetchResult:
+    """
+    GETs `url` through the shared pool, the host's 'scrape' rate limit and the per-host concurrency limit.
+    The body is streamed and cut at `max_bytes` or after `deadline_seconds` of wall-clock time.
+    If `content_types` is given, responses whose Content-Type matches none of them are skipped
+    before any of the body is read. Never raises: failures are reported in FetchResult.error.
+    """
+    try:
+        # Rate-limited (and paused on a 429) per host: one slow or throttling site doesn't stall the rest
+        host = urlsplit(url).netloc.lower()
+        return ratelimit.call_with_retry(f"scrape:{host}", _get, url, headers, max_bytes, timeout, deadline_seconds,
+                                         content_types)
+    except Exception as e:
+        logging.warning(f"Failed to fetch {url}: {e}")
+        return FetchResult(url=url, error=str(e))
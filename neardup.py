@@ -0,0 +1,184 @@
+# neardup.py
+"""
+Near-duplicate chunk suppression for syndicated content (the same wire story on many outlets).
+Chunks get a MinHash signature of their word shingles; LSH banding finds candidate matches
+among this ingest's chunks and, through a persistent SQLite signature index, earlier ingests.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import struct
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from langchain.schema import Document
+
+import config
+
+_WORD_RE = re.compile(r'\w+')
+_EMPTY_BIN = (1 << 64) - 1
+
+
+def minhash_signature(text: str) -> Optional[Tuple[int, ...]]:
+    """
+    One-permutation MinHash of the text's word shingles: each shingle is hashed once and the
+    minimum hash is kept per bin (hash mod NEARDUP_NUM_HASHES). Returns None for texts too short
+    to compare meaningfully.
+    """
+    words = _WORD_RE.findall(text.lower())
+    size = config.NEARDUP_SHINGLE_WORDS
+    if len(words) < size + config.NEARDUP_MIN_SHINGLES - 1:
+        return None
+    bins = config.NEARDUP_NUM_HASHES
+    signature = [_EMPTY_BIN] * bins
+    for i in range(len(words) - size + 1):
+        shingle = ' '.join(words[i:i + size]).encode('utf-8')
+        value = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), 'little')
+        slot = value % bins
+        if value < signature[slot]:
+            signature[slot] = value
+    return tuple(signature)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures (bins empty in both are ignored)."""
+    compared = matches = 0
+    for x, y in zip(a, b):
+        if x == _EMPTY_BIN and y == _EMPTY_BIN:
+            continue
+        compared += 1
+        matches += x == y
+    return matches / compared if compared else 0.0
+
+
+def _band_keys(signature: Tuple[int, ...]) -> List[bytes]:
+    """One bucket key per LSH band; two signatures sharing any key are candidate duplicates."""
+    rows = len(signature) // config.NEARDUP_BANDS
+    return [
+        bytes([band]) + hashlib.blake2b(struct.pack(f'<{rows}Q', *signature[band * rows:(band + 1) * rows]),
+                                        digest_size=8).digest()
+        for band in range(config.NEARDUP_BANDS)
+    ]
+
+
+class SignatureIndex:
+    """Persistent MinHash signatures of stored representative chunks, keyed by chunk ID, with LSH buckets."""
+
+    def __init__(self, directory: str = config.CACHE_DIRECTORY):
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "neardup.sqlite3")
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS signatures (chunk_id TEXT PRIMARY KEY, signature BLOB NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands (band_key BLOB NOT NULL, chunk_id TEXT NOT NULL, "
+                "PRIMARY KEY (band_key, chunk_id)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_bands_chunk ON bands (chunk_id)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def candidates(self, signature: Tuple[int, ...]) -> Dict[str, Tuple[int, ...]]:
+        """Stored chunks sharing at least one LSH bucket with the signature, with their signatures."""
+        keys = _band_keys(signature)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT s.chunk_id, s.signature FROM signatures s WHERE s.chunk_id IN "
+                f"(SELECT chunk_id FROM bands WHERE band_key IN ({','.join('?' * len(keys))}))",
+                keys,
+            ).fetchall()
+        return {chunk_id: struct.unpack(f'<{len(blob) // 8}Q', blob) for chunk_id, blob in rows}
+
+    def add(self, signatures: Dict[str, Tuple[int, ...]]):
+        if not signatures:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO signatures (chunk_id, signature) VALUES (?, ?)",
+                [(chunk_id, struct.pack(f'<{len(sig)}Q', *sig)) for chunk_id, sig in signatures.items()],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO bands (band_key, chunk_id) VALUES (?, ?)",
+                [(key, chunk_id) for chunk_id, sig in signatures.items() for key in _band_keys(sig)],
+            )
+
+    def remove(self, chunk_ids: Iterable[str]):
+        chunk_ids = [(chunk_id,) for chunk_id in chunk_ids]
+        if not chunk_ids:
+            return
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM signatures WHERE chunk_id = ?", chunk_ids)
+            conn.executemany("DELETE FROM bands WHERE chunk_id = ?", chunk_ids)
+
+
+def add_duplicate(metadata: Dict, url: str, competitor: Optional[str] = None):
+    """
+    Records a suppressed duplicate in its representative chunk's (Chroma-compatible, scalar) metadata:
+    its source URL, and its competitor when it differs (the same article collected for two competitors).
+    """
+    if competitor and competitor != metadata.get('competitor'):
+        competitors = set(filter(None, metadata.get('duplicate_competitors', '').split('; ')))
+        competitors.add(competitor)
+        metadata['duplicate_competitors'] = '; '.join(sorted(competitors))
+    if not url or url == 'N/A' or url == metadata.get('url'):
+        return
+    duplicate_urls = set(filter(None, metadata.get('duplicate_urls', '').split(' ')))
+    duplicate_urls.add(url)
+    metadata['duplicate_urls'] = ' '.join(sorted(duplicate_urls))
+    metadata['duplicate_count'] = len(duplicate_urls)
+
+
+def suppress_near_duplicates(chunks: Dict[str, Document], index: SignatureIndex,
+                             stored: Callable[[List[str]], Set[str]]
+                             ) -> Tuple[Dict[str, Document], Dict[str, List[Tuple[str, str]]],
+                                        Dict[str, Tuple[int, ...]]]:
+    """
+    Keeps one representative per cluster of near-duplicate chunks (estimated Jaccard similarity
+    >= NEARDUP_THRESHOLD), in input order; a chunk matching several is attached to the most
+    similar. Only chunks from NEARDUP_SOURCES take part.
+    A duplicate of a chunk kept in this batch adds its URL (and competitor) to that chunk's metadata;
+    a duplicate of a chunk stored by an earlier ingest is returned in the second value (stored chunk
+    ID -> (URL, competitor) pairs) so the caller can update the stored metadata. `stored(ids)` returns
+    which indexed chunks still exist in the vector store (stale index entries are dropped). The third
+    value holds the signatures of the kept chunks, to add to the index once they are stored.
+    """
+    kept: Dict[str, Document] = {}
+    stored_duplicates: Dict[str, List[Tuple[str, str]]] = {}
+    new_signatures: Dict[str, Tuple[int, ...]] = {}
+    batch_buckets: Dict[bytes, List[str]] = {}
+
+    for chunk_id, chunk in chunks.items():
+        signature = None
+        if chunk.metadata.get('source') in config.NEARDUP_SOURCES:
+            signature = minhash_signature(chunk.page_content)
+        if signature is None:
+            kept[chunk_id] = chunk
+            continue
+
+        keys = _band_keys(signature)
+        batch_candidates = dict.fromkeys(other for key in keys for other in batch_buckets.get(key, []))
+        batch_matches = {other: similarity(signature, new_signatures[other]) for other in batch_candidates}
+        batch_matches = {other: sim for other, sim in batch_matches.items() if sim >= config.NEARDUP_THRESHOLD}
+        if batch_matches:
+            match = max(batch_matches, key=batch_matches.get) # The closest representative
+            add_duplicate(kept[match].metadata, chunk.metadata.get('url'), chunk.metadata.get('competitor'))
+            continue
+
+        indexed = {other: similarity(signature, sig) for other, sig in index.candidates(signature).items()}
+        indexed = {other: sim for other, sim in indexed.items() if sim >= config.NEARDUP_THRESHOLD}
+        if indexed:
+            live = stored(list(indexed))
+            index.remove(set(indexed) - live) # Representatives deleted since (e.g. a changed page)
+            if live:
+                # The most similar stored representative (ties broken by chunk ID, so the choice is stable)
+                match = max(sorted(live), key=indexed.get)
+                duplicate = (chunk.metadata.get('url'), chunk.metadata.get('competitor'))
+                stored_duplicates.setdefault(match, []).append(duplicate)
+                continue
+
+        kept[chunk_id] = chunk
+        new_signatures[chunk_id] = signature
+        for key in keys:
+            batch_buckets.setdefault(key, []).append(chunk_id)
+
+    return kept, stored_duplicates, new_signatures
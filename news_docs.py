@@ -0,0 +1,32 @@
+# news_docs.py
+"""
+NewsAPI article -> Document conversion, shared by live collection (agent.py) and archive replay.
+Kept free of API clients and other import-time setup so replay worker processes can import it cheaply.
+"""
+from typing import Dict, List
+
+from langchain.schema import Document
+
+import utils
+
+
+def article_metadata(article: Dict, competitor_name: str) -> Dict:
+    """Builds the standard news Document metadata for a raw NewsAPI article."""
+    return {
+        "source": "newsapi",
+        "competitor": competitor_name,
+        "title": article.get('title', 'N/A'),
+        "url": article.get('url', 'N/A'),
+        "publish_date": article.get('publishedAt', 'N/A') # Keep original format for now
+    }
+
+
+def articles_to_docs(articles: List[Dict], competitor_name: str) -> List[Document]:
+    """Converts raw NewsAPI articles into cleaned Document objects."""
+    docs = []
+    contents = utils.clean_texts(article.get('content') or article.get('description') for article in articles)
+    for article, content in zip(articles, contents):
+        if not content: # Skip articles with no usable content
+            continue
+        docs.append(Document(page_content=content, metadata=article_metadata(article, competitor_name)))
+    return docs
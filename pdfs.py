@@ -0,0 +1,78 @@
+# pdfs.py
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List
+from urllib.parse import unquote, urlsplit
+
+from langchain.schema import Document
+from pypdf import PdfReader
+
+import config
+import http_client
+import politeness
+import utils
+
+PDF_CONTENT_TYPES = ('application/pdf', 'application/x-pdf')
+
+
+def is_pdf_link(url: str) -> bool:
+    return urlsplit(url).path.lower().endswith('.pdf')
+
+
+def parse_pdf(data: bytes) -> List[str]:
+    """Extracts the text of each page of a PDF. Runs in a worker process (CPU-bound, holds the GIL)."""
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        return [page.extract_text() or "" for page in reader.pages[:config.PDF_MAX_PAGES]]
+    except Exception as e: # pypdf raises a variety of errors on malformed files
+        logging.warning(f"Could not parse PDF: {e}")
+        return []
+
+
+def _fetch_pdf(url: str) -> bytes:
+    result = http_client.fetch(url, max_bytes=config.PDF_MAX_BYTES, content_types=PDF_CONTENT_TYPES)
+    if not result.ok or result.truncated: # A cut-off PDF can't be parsed
+        return b""
+    return result.body
+
+
+def collect_pdf_documents(pdf_urls: List[str], max_files: int = config.PDF_MAX_FILES) -> List[Document]:
+    """
+    Downloads linked PDFs (politely, through the shared pool) and parses them in a process pool
+    so extraction doesn't hold the GIL on the app thread. Returns one Document per non-empty
+    page, with the 1-based page number in metadata['page'].
+    """
+    urls = [url for url in dict.fromkeys(pdf_urls) if politeness.can_fetch(url)][:max_files]
+    if not urls:
+        return []
+    logging.info(f"Fetching {len(urls)} linked PDF(s)...")
+    bodies = [body or b"" for body in politeness.polite_map(_fetch_pdf, urls)]
+    fetched = [(url, body) for url, body in zip(urls, bodies) if body]
+    if not fetched:
+        return []
+
+    with ProcessPoolExecutor(max_workers=config.PDF_PARSE_WORKERS,
+                             mp_context=multiprocessing.get_context(config.PROCESS_START_METHOD)) as executor:
+        parsed = list(executor.map(parse_pdf, [body for _, body in fetched]))
+
+    fetch_date = datetime.now().strftime('%Y-%m-%d')
+    docs = []
+    for (url, _), pages in zip(fetched, parsed):
+        title = unquote(urlsplit(url).path.rsplit('/', 1)[-1])
+        for page_number, text in enumerate(utils.clean_texts(pages), start=1):
+            if not text:
+                continue
+            metadata = {
+                "source": "website",
+                "url": url,
+                "title": title,
+                "fetch_date": fetch_date,
+                "content_type": "pdf",
+                "page": page_number,
+            }
+            docs.append(Document(page_content=text, metadata=metadata))
+    logging.info(f"Parsed {len(docs)} PDF pages from {len(fetched)} file(s).")
+    return docs
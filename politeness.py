@@ -0,0 +1,139 @@
+# politeness.py
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import config
+import cache
+import http_client
+import ratelimit
+
+# Raw robots.txt per site root (TTL-bounded on disk), plus the parsed rules kept in memory
+robots_cache = cache.get_robots_cache()
+_parsed_robots: Dict[str, Tuple[float, RobotFileParser]] = {}
+_parsed_robots_lock = threading.Lock()
+
+
+def _site_root(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc.lower()}"
+
+
+def _load_robots(root: str) -> RobotFileParser:
+    """Fetches (or reads from cache) and parses robots.txt for a site root."""
+    key = cache.ResponseCache.make_key("robots", root)
+    cached = robots_cache.get(key)
+    if cached is None:
+        result = http_client.fetch(f"{root}/robots.txt")
+        cached = {"status": result.status, "text": result.text if result.ok else ""}
+        if result.status is not None: # Don't cache network errors, retry on the next run
+            robots_cache.set(key, cached)
+
+    parser = RobotFileParser(f"{root}/robots.txt")
+    if cached['status'] in (401, 403):
+        parser.disallow_all = True
+    elif cached['text']:
+        parser.parse(cached['text'].splitlines())
+    else:
+        parser.allow_all = True # No robots.txt (404 etc.): everything is allowed
+    return parser
+
+
+def get_robots(url: str) -> RobotFileParser:
+    """Returns the parsed robots.txt rules for the URL's site, cached for ROBOTS_CACHE_TTL_SECONDS."""
+    root = _site_root(url)
+    now = time.monotonic()
+    with _parsed_robots_lock:
+        entry = _parsed_robots.get(root)
+        if entry and entry[0] > now:
+            return entry[1]
+    parser = _load_robots(root)
+    with _parsed_robots_lock:
+        _parsed_robots[root] = (now + config.ROBOTS_CACHE_TTL_SECONDS, parser)
+    return parser
+
+
+def can_fetch(url: str) -> bool:
+    """True if robots.txt allows our user agent to fetch the URL (always True if RESPECT_ROBOTS_TXT is off)."""
+    if not config.RESPECT_ROBOTS_TXT:
+        return True
+    return get_robots(url).can_fetch(config.HTTP_USER_AGENT, url)
+
+
+def crawl_delay(url: str) -> float:
+    """Seconds to wait between requests to the URL's host: robots.txt Crawl-delay or CRAWL_MIN_DELAY_SECONDS."""
+    delay = None
+    if config.RESPECT_ROBOTS_TXT:
+        rules = get_robots(url)
+        delay = rules.crawl_delay(config.HTTP_USER_AGENT)
+        if delay is None and rules.request_rate(config.HTTP_USER_AGENT):
+            rate = rules.request_rate(config.HTTP_USER_AGENT)
+            delay = rate.seconds / max(1, rate.requests)
+    return max(float(delay or 0), config.CRAWL_MIN_DELAY_SECONDS)
+
+
+def sitemaps(url: str) -> List[str]:
+    """Sitemap URLs declared in the site's (cached) robots.txt."""
+    return get_robots(url).site_maps() or []
+
+
+def polite_map(fn: Callable[[str], Any], urls: List[str], max_workers: int = config.CRAWL_MAX_WORKERS) -> List[Any]:
+    """
+    Runs fn(url) for every URL on a shared pool while enforcing, per host, a concurrency limit
+    (HTTP_MAX_PER_HOST, or 1 when the host sets a crawl-delay) and the crawl-delay between requests.
+    URLs of hosts that are not ready yet wait in per-host queues instead of occupying a worker,
+    so the pool stays busy with other hosts. Results are returned in the order of `urls`.
+    """
+    results: List[Optional[Any]] = [None] * len(urls)
+    queues: Dict[str, deque] = {}
+    for index, url in enumerate(urls):
+        queues.setdefault(_site_root(url), deque()).append((index, url))
+    delays = {host: crawl_delay(host) for host in queues}
+    limits = {host: 1 if delays[host] > 0 else config.HTTP_MAX_PER_HOST for host in queues}
+    next_ready = {host: 0.0 for host in queues}
+    in_flight = Counter()
+
+    with ratelimit.ContextThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {}
+        while queues or futures:
+            now = time.monotonic()
+            dispatched = False
+            # Round-robin: at most one new request per host per pass
+            for host in list(queues):
+                if len(futures) >= max_workers:
+                    break
+                if in_flight[host] >= limits[host] or next_ready[host] > now:
+                    continue
+                index, url = queues[host].popleft()
+                if not queues[host]:
+                    del queues[host]
+                in_flight[host] += 1
+                next_ready[host] = now + delays[host]
+                futures[executor.submit(fn, url)] = (index, host)
+                dispatched = True
+            if dispatched:
+                continue
+
+            # Nothing dispatchable: wait for a completion or the next host to come off its delay
+            # (with the pool full, only a completion can free a worker)
+            waits = []
+            if len(futures) < max_workers:
+                waits = [next_ready[h] - now for h in queues if in_flight[h] < limits[h]]
+            timeout = max(0.0, min(waits)) if waits else None
+            if futures:
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, host = futures.pop(future)
+                    in_flight[host] -= 1
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        logging.error(f"Error fetching {urls[index]}: {e}")
+            elif timeout:
+                time.sleep(timeout)
+    return results
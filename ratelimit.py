@@ -0,0 +1,235 @@
+# ratelimit.py
+import asyncio
+import contextvars
+import functools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+import config
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by every thread (and event loop) in the process.
+    Refills at `rate` tokens per second up to `capacity`. A Retry-After from the server
+    pauses the whole bucket, so all callers back off together instead of piling on.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: float = 1.0) -> float:
+        """Takes tokens if available and returns 0, otherwise returns the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Blocks the calling thread until `tokens` are available."""
+        while True:
+            wait_seconds = self._try_acquire(tokens)
+            if not wait_seconds:
+                return
+            time.sleep(wait_seconds)
+
+    async def acquire_async(self, tokens: float = 1.0):
+        """Waits without blocking the event loop until `tokens` are available."""
+        while True:
+            wait_seconds = self._try_acquire(tokens)
+            if not wait_seconds:
+                return
+            await asyncio.sleep(wait_seconds)
+
+    def pause(self, seconds: float):
+        """Stops handing out tokens for `seconds` (e.g. after a 429 with Retry-After)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class RetryBudget:
+    """Caps the total number of retries spent across all calls of one report run (see new_retry_budget)."""
+
+    def __init__(self, max_retries: int):
+        self.max_retries = max_retries
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self) -> bool:
+        """Consumes one retry if any are left."""
+        with self._lock:
+            if self.spent >= self.max_retries:
+                return False
+            self.spent += 1
+            return True
+
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+# The current report run's budget. Each run (e.g. each Streamlit session's button click) sets its own,
+# so concurrent sessions never share or reset each other's; standalone callers share the default.
+_retry_budget: contextvars.ContextVar[RetryBudget] = contextvars.ContextVar(
+    'retry_budget', default=RetryBudget(config.RETRY_BUDGET_PER_REPORT))
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor whose tasks run in a copy of the submitting thread's context, so work fanned
+    out to worker threads spends the retry budget of the report run that started it.
+    """
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def get_limiter(service: str) -> TokenBucket:
+    """
+    Returns the process-wide limiter for `service` ('newsapi', 'scrape', 'embeddings', 'llm').
+    A 'service:key' name (e.g. 'scrape:example.com') gets its own bucket at the service's rate,
+    so one site's pace or Retry-After doesn't hold back the others.
+    """
+    with _limiters_lock:
+        if service not in _limiters:
+            rate = config.RATE_LIMITS_PER_SECOND.get(service.split(':', 1)[0], 1.0)
+            _limiters[service] = TokenBucket(rate=rate, capacity=max(1.0, rate))
+        return _limiters[service]
+
+
+def new_retry_budget() -> RetryBudget:
+    """
+    Starts a fresh retry budget for the current context; call once at the start of each report run.
+    Threads started through ContextThreadPoolExecutor from this context share it.
+    """
+    budget = RetryBudget(config.RETRY_BUDGET_PER_REPORT)
+    _retry_budget.set(budget)
+    return budget
+
+
+def current_retry_budget() -> RetryBudget:
+    return _retry_budget.get()
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    """Best-effort HTTP status of an exception from requests, NewsAPI or Google clients."""
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(exc, 'code', None)
+    if isinstance(status, int):
+        return status
+    get_code = getattr(exc, 'get_code', None) # NewsAPIException
+    if callable(get_code) and get_code() == 'rateLimited':
+        return 429
+    if type(exc).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+        return 429
+    if type(exc).__name__ in ('ServiceUnavailable', 'InternalServerError', 'DeadlineExceeded'):
+        return 503
+    return None
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Parses a Retry-After header (seconds or HTTP date) from the exception's response, if any."""
+    headers = getattr(getattr(exc, 'response', None), 'headers', None) or {}
+    value = headers.get('Retry-After') if hasattr(headers, 'get') else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _is_retryable(exc: Exception) -> bool:
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    # requests' ConnectionError (incl. SSLError, ConnectTimeout), Timeout and ChunkedEncodingError
+    # don't subclass the builtins; other clients' (e.g. httpx) are matched by name
+    if isinstance(exc, (ConnectionError, TimeoutError, requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError)):
+        return True
+    return type(exc).__name__ in ('ConnectionError', 'Timeout', 'ReadTimeout', 'ConnectTimeout')
+
+
+def _backoff_delay(exc: Exception, attempt: int) -> float:
+    retry_after = _retry_after(exc)
+    if retry_after is not None:
+        return min(retry_after, config.RETRY_MAX_DELAY_SECONDS)
+    delay = config.RETRY_BASE_DELAY_SECONDS * (2 ** attempt)
+    return min(delay, config.RETRY_MAX_DELAY_SECONDS) * random.uniform(0.5, 1.0) # Jitter
+
+
+def call_with_retry(service: str, fn: Callable, *args, **kwargs) -> Any:
+    """
+    Calls fn(*args, **kwargs) under the service's rate limit.
+    429/5xx/connection errors are retried with exponential backoff (honouring Retry-After)
+    while attempts and the per-report retry budget last; other errors are raised immediately.
+    """
+    limiter = get_limiter(service)
+    retry_budget = current_retry_budget()
+    for attempt in range(config.RETRY_MAX_ATTEMPTS):
+        limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt + 1 >= config.RETRY_MAX_ATTEMPTS or not _is_retryable(e) or not retry_budget.try_spend():
+                raise
+            delay = _backoff_delay(e, attempt)
+            if _status_code(e) == 429:
+                limiter.pause(delay)
+            logging.warning(f"{service} call failed ({e}); retry {attempt + 1} in {delay:.1f}s "
+                            f"(budget {retry_budget.spent}/{retry_budget.max_retries}).")
+            time.sleep(delay)
+
+
+async def call_with_retry_async(service: str, fn: Callable, *args, **kwargs) -> Any:
+    """Async counterpart of call_with_retry for coroutine functions."""
+    limiter = get_limiter(service)
+    retry_budget = current_retry_budget()
+    for attempt in range(config.RETRY_MAX_ATTEMPTS):
+        await limiter.acquire_async()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            if attempt + 1 >= config.RETRY_MAX_ATTEMPTS or not _is_retryable(e) or not retry_budget.try_spend():
+                raise
+            delay = _backoff_delay(e, attempt)
+            if _status_code(e) == 429:
+                limiter.pause(delay)
+            logging.warning(f"{service} call failed ({e}); retry {attempt + 1} in {delay:.1f}s "
+                            f"(budget {retry_budget.spent}/{retry_budget.max_retries}).")
+            await asyncio.sleep(delay)
+
+
+class RateLimitedClient:
+    """Proxies an API client so every method call goes through call_with_retry for `service`."""
+
+    def __init__(self, client, service: str):
+        self.client = client
+        self.service = service
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+        return functools.partial(call_with_retry, self.service, attr)
@@ -3,12 +3,20 @@ import chromadb
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from typing import List
+from typing import List, Iterable, Dict, Tuple
 import logging
+import hashlib
 from datetime import datetime
 
 import config # Import config variables
+import chunking
+import neardup
+import ratelimit
+import state
+import urls
+
+# Sources whose documents carry a 'publish_date' that report-time date filtering applies to
+DATED_SOURCES = ('newsapi', 'rss')
 
 # Initialize embedding function globally (or pass it around)
 try:
@@ -20,6 +28,11 @@ except Exception as e:
     logging.error(f"Failed to initialize embedding function: {e}")
     embedding_function = None
 
+# Content fingerprint of every website page stored so far, keyed by URL
+page_fingerprints = state.StateStore("page_fingerprints")
+# MinHash signatures of stored chunks, for near-duplicate suppression across ingests
+signature_index = neardup.SignatureIndex()
+
 def get_vector_store(path: str = config.VECTOR_DB_DIRECTORY,
                      collection_name: str = config.VECTOR_DB_COLLECTION) -> Chroma:
     """Initializes or loads a ChromaDB vector store."""
@@ -38,33 +51,165 @@ def get_vector_store(path: str = config.VECTOR_DB_DIRECTORY,
     logging.info(f"Initialized Chroma vector store at '{path}' with collection '{collection_name}'")
     return vector_store
 
-def process_and_store_documents(docs: List[Document], vector_store: Chroma):
-    """Chunks documents and adds them to the vector store."""
+def _page_fingerprints(docs: List[Document]) -> Dict[str, str]:
+    """
+    SHA-256 of the content of each website page (all sections of a URL combined), keyed by URL.
+    HTML pages contribute their 'text_fingerprint' (taken before batch-dependent cleanup), so the
+    same page gives the same fingerprint whether it came from a crawl, a sitemap delta or a scrape.
+    """
+    pages = {}
+    for doc in docs:
+        if doc.metadata.get('source') == 'website':
+            pages.setdefault(doc.metadata.get('url', 'N/A'), []).append(
+                doc.metadata.get('text_fingerprint') or doc.page_content)
+    return {url: hashlib.sha256("\n".join(texts).encode('utf-8')).hexdigest() for url, texts in pages.items()}
+
+def classify_page_changes(docs: List[Document]) -> Dict[str, str]:
+    """
+    Compares website pages against the fingerprints of the last stored version.
+    Returns URL -> 'new', 'changed' or 'unchanged' (a cheap "website changed since last report" signal).
+    """
+    changes = {}
+    for url, fingerprint in _page_fingerprints(docs).items():
+        previous = page_fingerprints.get(url)
+        changes[url] = 'new' if previous is None else ('unchanged' if previous == fingerprint else 'changed')
+    return changes
+
+def chunk_id(chunk: Document) -> str:
+    """
+    Deterministic ID of a chunk: its source document (source, canonical URL, PDF page, news competitor),
+    its position in that document and a hash of its content. The same chunk always gets the same ID,
+    so storing it again is a no-op.
+    """
+    url = chunk.metadata.get('url', 'N/A')
+    key = "\x1f".join([
+        chunk.metadata.get('source', 'unknown'),
+        urls.canonicalize_url(url) if url != 'N/A' else chunk.metadata.get('title', 'N/A'),
+        str(chunk.metadata.get('page', '')),
+        chunk.metadata.get('competitor', ''),
+        str(chunk.metadata.get('chunk_index', '')),
+        hashlib.sha256(chunk.page_content.encode('utf-8')).hexdigest(),
+    ])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def _existing_ids(vector_store: Chroma, ids: List[str]) -> set:
+    """The subset of `ids` already present in the collection."""
+    existing = set()
+    for i in range(0, len(ids), config.EMBEDDING_BATCH_SIZE):
+        existing.update(vector_store.get(ids=ids[i:i + config.EMBEDDING_BATCH_SIZE], include=[]).get('ids', []))
+    return existing
+
+def _delete_page_chunks(vector_store: Chroma, url: str, keep_ids: set = frozenset()):
+    """Removes the previously stored chunks of a website page, except those in `keep_ids` (still current)."""
+    ids = vector_store.get(where={"$and": [{"source": "website"}, {"url": url}]}, include=[]).get('ids', [])
+    ids = [stored_id for stored_id in ids if stored_id not in keep_ids]
+    if ids:
+        vector_store.delete(ids=ids)
+        signature_index.remove(ids)
+        logging.info(f"Removed {len(ids)} outdated chunks for {url}.")
+
+def _attach_duplicates(vector_store: Chroma, duplicates: Dict[str, List[Tuple[str, str]]]):
+    """Adds the URLs and competitors of suppressed near-duplicates to already stored chunks (metadata only, no re-embedding)."""
+    if not duplicates:
+        return
+    stored = vector_store.get(ids=list(duplicates), include=['metadatas'])
+    for stored_id, metadata in zip(stored['ids'], stored['metadatas']):
+        for url, competitor in duplicates[stored_id]:
+            neardup.add_duplicate(metadata, url, competitor)
+    vector_store._collection.update(ids=stored['ids'], metadatas=stored['metadatas'])
+
+def process_and_store_documents(docs: List[Document], vector_store: Chroma, skip_unchanged: bool = True) -> bool:
+    """
+    Chunks documents and upserts them into the vector store under deterministic chunk IDs
+    (chunks already stored are not embedded again).
+    With skip_unchanged=True, website pages whose content fingerprint matches the last stored version are skipped.
+    Returns False if storing failed (errors are logged), True otherwise (including when there was nothing to store).
+    """
     # ... (No changes needed here for Phase 2, it accepts List[Document]) ...
     if not docs:
         logging.warning("No documents received for processing and storage.")
-        return
+        return True
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-    )
-    # Ensure metadata is preserved during splitting
-    split_docs = text_splitter.split_documents(docs)
+    # Unchanged website pages skip chunking/embedding entirely; changed ones replace their old chunks
+    changes = classify_page_changes(docs)
+    unchanged = {url for url, status in changes.items() if status == 'unchanged' and skip_unchanged}
+    if unchanged:
+        logging.info(f"Skipping {len(unchanged)} unchanged website page(s).")
+        docs = [doc for doc in docs if not (doc.metadata.get('source') == 'website' and doc.metadata.get('url', 'N/A') in unchanged)]
+        if not docs:
+            return True
+
+    # Metadata is preserved during splitting; large ingests are split in a process pool
+    split_docs = chunking.split_documents(docs)
 
     if not split_docs:
         logging.warning(f"Splitting {len(docs)} documents resulted in zero chunks.")
-        return
+        return True
+
+    # One entry per ID: the same chunk can arrive twice in one ingest (e.g. a page and its AMP copy)
+    chunks_by_id = {}
+    for chunk in split_docs:
+        chunks_by_id.setdefault(chunk_id(chunk), chunk)
 
-    logging.info(f"Adding {len(split_docs)} chunks to the vector store...")
     try:
-        # Add IDs to potentially avoid duplicates if content is identical? Or rely on Chroma's handling.
-        # ids = [f"{doc.metadata.get('source', 'unknown')}_{hash(doc.page_content)}" for doc in split_docs] # Example ID generation
-        vector_store.add_documents(split_docs) # Chroma handles ID generation by default
+        existing = _existing_ids(vector_store, list(chunks_by_id))
+        for url, status in changes.items():
+            if status == 'changed':
+                _delete_page_chunks(vector_store, url, keep_ids=existing)
+        new_chunks = {new_id: chunk for new_id, chunk in chunks_by_id.items() if new_id not in existing}
+        stored_duplicates, signatures = {}, {}
+        if config.NEARDUP_ENABLED:
+            # Syndicated copies of a story are embedded once; their URLs are kept on the representative
+            candidates = len(new_chunks)
+            new_chunks, stored_duplicates, signatures = neardup.suppress_near_duplicates(
+                new_chunks, signature_index, lambda ids: _existing_ids(vector_store, ids))
+            if len(new_chunks) < candidates:
+                logging.info(f"Suppressed {candidates - len(new_chunks)} near-duplicate chunks.")
+        new_ids = list(new_chunks)
+        logging.info(f"Adding {len(new_ids)} chunks to the vector store ({len(existing)} already stored)...")
+        # Embed and upsert in batches so each rate-limited call stays small and retries are cheap
+        for i in range(0, len(new_ids), config.EMBEDDING_BATCH_SIZE):
+            batch_ids = new_ids[i:i + config.EMBEDDING_BATCH_SIZE]
+            batch = [new_chunks[new_id] for new_id in batch_ids]
+            # Chroma upserts: re-adding an ID replaces it instead of creating a duplicate
+            ratelimit.call_with_retry("embeddings", vector_store.add_documents, batch, ids=batch_ids)
+        signature_index.add(signatures)
+        _attach_duplicates(vector_store, stored_duplicates)
+        # Record fingerprints only once the new chunks are safely stored
+        for url, fingerprint in _page_fingerprints(docs).items():
+            page_fingerprints.set(url, fingerprint)
         logging.info("Successfully added documents to vector store.")
+        return True
     except Exception as e:
         logging.error(f"Error adding documents to vector store: {e}")
+        return False
+
+def process_and_store_stream(docs: Iterable[Document], vector_store: Chroma, batch_size: int = config.EMBEDDING_BATCH_SIZE) -> int:
+    """
+    Consumes a Document iterator (e.g. agent.iter_news_data) and chunks/stores it in batches,
+    so embedding starts before the producer has finished. Returns the number of documents stored;
+    a batch that fails to store is logged and skipped, and the rest of the stream is still stored.
+    """
+    batch = []
+    stored = failed = 0
+    def flush():
+        nonlocal stored, failed
+        if process_and_store_documents(batch, vector_store):
+            stored += len(batch)
+        else:
+            failed += len(batch)
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    if failed:
+        logging.error(f"Streamed {stored} documents into the vector store; {failed} could not be stored.")
+    else:
+        logging.info(f"Streamed {stored} documents into the vector store.")
+    return stored
 
 def create_basic_retriever(vector_store: Chroma, search_k: int = 5):
     """Creates a basic vector store retriever."""
@@ -72,8 +217,9 @@ def create_basic_retriever(vector_store: Chroma, search_k: int = 5):
 
 def filter_documents_by_date(docs: List[Document], start_date_str: str) -> List[Document]:
     """
-    Filters documents based on their 'publish_date' metadata *if* the source is 'newsapi'.
-    Other sources (like 'website') are passed through without date filtering by this function.
+    Filters documents based on their 'publish_date' metadata *if* the source is in DATED_SOURCES
+    ('newsapi', 'rss'). Other sources (like 'website') are passed through without date filtering by this function.
+    Undated feed entries are kept, as feeds.collect_feed_data keeps them.
     """
     if not docs: return []
 
@@ -84,10 +230,13 @@ def filter_documents_by_date(docs: List[Document], start_date_str: str) -> List[
 
     for doc in docs:
         source = doc.metadata.get('source')
-        if source == 'newsapi':
+        if source in DATED_SOURCES:
             news_count += 1
             publish_date_str = doc.metadata.get('publish_date')
-            if publish_date_str:
+            if source == 'rss' and publish_date_str in (None, '', 'N/A'):
+                filtered_docs.append(doc)
+                news_kept_count += 1
+            elif publish_date_str:
                 try:
                     # Handle potential 'T'/'Z' in ISO format dates
                     if 'T' in publish_date_str:
@@ -106,5 +255,5 @@ def filter_documents_by_date(docs: List[Document], start_date_str: str) -> List[
             # Pass through documents from other sources (like 'website')
             filtered_docs.append(doc)
 
-    logging.info(f"Date filtering applied to {news_count} news docs >= {start_date_str}. Kept {news_kept_count} news docs. Total docs after filter (incl. non-news): {len(filtered_docs)}.")
+    logging.info(f"Date filtering applied to {news_count} news/feed docs >= {start_date_str}. Kept {news_kept_count} news/feed docs. Total docs after filter (incl. non-news): {len(filtered_docs)}.")
     return filtered_docs
\ No newline at end of file
@@ -0,0 +1,181 @@
+# sources.py
+import logging
+import os
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from langchain.schema import Document
+
+import config
+import agent
+import feeds
+import state
+import ratelimit
+
+
+class Source:
+    """
+    A place competitor information is collected from (news, website, feeds, local files...).
+    Subclasses set `name` and implement collect(); register them with register_source().
+    collect() must not write persistent state itself: sync marks, validators etc. are queued on
+    `pending` and only committed by the caller once the returned documents are stored.
+    """
+    name = "source"
+
+    @property
+    def deadline_seconds(self) -> float:
+        """How long the fan-out waits for this source before reporting without it."""
+        return config.SOURCE_DEADLINES_SECONDS.get(self.name, config.SOURCE_DEFAULT_DEADLINE_SECONDS)
+
+    def is_enabled(self, competitor_name: str, competitor_url: str) -> bool:
+        return True
+
+    def collect(self, competitor_name: str, competitor_url: str, days_back: int,
+                pending: state.PendingState) -> List[Document]:
+        raise NotImplementedError
+
+
+class NewsSource(Source):
+    """NewsAPI articles, optionally synced incrementally and enriched with full text."""
+    name = "news"
+
+    def collect(self, competitor_name: str, competitor_url: str, days_back: int,
+                pending: state.PendingState) -> List[Document]:
+        docs = agent.collect_news_data(competitor_name, days_back, incremental=config.NEWS_INCREMENTAL_SYNC,
+                                       skip_seen=config.NEWS_SKIP_SEEN_URLS, pending=pending)
+        if docs and config.NEWS_FETCH_FULL_TEXT:
+            docs = agent.enrich_news_documents(docs)
+        return docs
+
+
+class WebsiteSource(Source):
+    """The competitor's own website (only when a URL was provided)."""
+    name = "website"
+
+    def is_enabled(self, competitor_name: str, competitor_url: str) -> bool:
+        return bool(competitor_url)
+
+    def collect(self, competitor_name: str, competitor_url: str, days_back: int,
+                pending: state.PendingState) -> List[Document]:
+        return agent.scrape_website_data(competitor_url, crawl=config.WEBSITE_CRAWL_ENABLED, pending=pending)
+
+
+class RssSource(Source):
+    """Press-release/blog RSS or Atom feeds listed for the competitor in config.COMPETITOR_FEEDS."""
+    name = "rss"
+
+    def _feed_urls(self, competitor_name: str) -> List[str]:
+        return config.COMPETITOR_FEEDS.get(competitor_name.strip().lower(), [])
+
+    def is_enabled(self, competitor_name: str, competitor_url: str) -> bool:
+        return bool(self._feed_urls(competitor_name))
+
+    def collect(self, competitor_name: str, competitor_url: str, days_back: int,
+                pending: state.PendingState) -> List[Document]:
+        docs = []
+        for feed_url in self._feed_urls(competitor_name):
+            docs.extend(feeds.collect_feed_data(feed_url, competitor_name, days_back, pending=pending))
+        return docs
+
+
+class LocalFilesSource(Source):
+    """
+    Text/Markdown notes dropped into config.LOCAL_SOURCES_DIRECTORY/<competitor name>/
+    (e.g. analyst notes or exported reports).
+    """
+    name = "local_files"
+
+    def _directory(self, competitor_name: str) -> str:
+        return os.path.join(config.LOCAL_SOURCES_DIRECTORY, competitor_name.strip().lower())
+
+    def is_enabled(self, competitor_name: str, competitor_url: str) -> bool:
+        return os.path.isdir(self._directory(competitor_name))
+
+    def collect(self, competitor_name: str, competitor_url: str, days_back: int,
+                pending: state.PendingState) -> List[Document]:
+        directory = self._directory(competitor_name)
+        docs = []
+        for file_name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, file_name)
+            if not file_name.endswith(('.txt', '.md')) or not os.path.isfile(path):
+                continue
+            with open(path, encoding='utf-8', errors='replace') as f:
+                content = f.read().strip()
+            if not content:
+                continue
+            metadata = {
+                "source": "local_file",
+                "competitor": competitor_name,
+                "title": file_name,
+                "url": os.path.abspath(path),
+                "fetch_date": datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d'),
+            }
+            docs.append(Document(page_content=content, metadata=metadata))
+        return docs
+
+
+_registry: Dict[str, Source] = {}
+
+
+def register_source(source: Source):
+    """Adds (or replaces) a source in the registry used by collect_all()."""
+    _registry[source.name] = source
+
+
+def get_sources() -> List[Source]:
+    """Returns the registered sources that are switched on in config.ENABLED_SOURCES."""
+    return [_registry[name] for name in config.ENABLED_SOURCES if name in _registry]
+
+
+register_source(NewsSource())
+register_source(WebsiteSource())
+register_source(RssSource())
+register_source(LocalFilesSource())
+
+
+def collect_all(competitor_name: str, competitor_url: str, days_back: int,
+                sources: Optional[List[Source]] = None,
+                pending: Optional[state.PendingState] = None) -> Dict[str, Optional[List[Document]]]:
+    """
+    Runs every enabled source for a competitor in parallel, each under its own deadline.
+    Returns source name -> Documents; a value of None means the source failed or missed its
+    deadline, and the report goes ahead without it.
+    Each source queues its state updates separately; only those of sources whose documents are
+    returned are moved onto `pending` (commit it once they are stored; without `pending` they are
+    committed right away). A source that missed its
+    deadline may keep running in the background, but its updates are discarded.
+    """
+    sources = [s for s in (sources or get_sources()) if s.is_enabled(competitor_name, competitor_url)]
+    if not sources:
+        return {}
+
+    start = time.monotonic()
+    # Not used as a context manager: exiting would wait for sources that missed their deadline
+    executor = ratelimit.ContextThreadPoolExecutor(max_workers=len(sources))
+    source_pending = {s.name: state.PendingState() for s in sources}
+    futures = {s.name: executor.submit(s.collect, competitor_name, competitor_url, days_back, source_pending[s.name])
+               for s in sources}
+    results = {}
+    try:
+        # Wait for the shortest deadlines first so each source gets its full budget from `start`
+        for source in sorted(sources, key=lambda s: s.deadline_seconds):
+            remaining = max(0.0, start + source.deadline_seconds - time.monotonic())
+            try:
+                results[source.name] = futures[source.name].result(timeout=remaining)
+                if pending is None:
+                    source_pending[source.name].commit() # The caller doesn't defer updates
+                else:
+                    pending.extend(source_pending[source.name])
+                logging.info(f"Source '{source.name}' returned {len(results[source.name])} documents "
+                             f"in {time.monotonic() - start:.1f}s.")
+            except FutureTimeoutError: # Not the builtin TimeoutError before Python 3.11
+                logging.warning(f"Source '{source.name}' missed its {source.deadline_seconds}s deadline; continuing without it.")
+                results[source.name] = None
+            except Exception as e:
+                logging.error(f"Source '{source.name}' failed: {e}")
+                results[source.name] = None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
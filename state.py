@@ -0,0 +1,114 @@
+# state.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import config
+
+
+class StateStore:
+    """
+    Persistent JSON key/value store backed by SQLite, used for sync bookkeeping
+    (e.g. per-competitor news high-water marks). Entries never expire.
+    Each store lives in its own `namespace` so several can share one database file.
+    """
+
+    def __init__(self, namespace: str, path: str = os.path.join(config.CACHE_DIRECTORY, "state.sqlite3")):
+        self.namespace = namespace
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
+        """Returns the stored value for `key`, or `default` if it has never been set."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Returns the stored values of the given keys that have been set, in one pass."""
+        keys = list(dict.fromkeys(keys))
+        values = {}
+        with self._lock, self._connect() as conn:
+            for i in range(0, len(keys), 500): # Stay under SQLite's bound-parameter limit
+                batch = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, value FROM state WHERE namespace = ? AND key IN ({','.join('?' * len(batch))})",
+                    (self.namespace, *batch),
+                ).fetchall()
+                values.update((key, json.loads(value)) for key, value in rows)
+        return values
+
+    def set(self, key: str, value: Any):
+        """Stores a JSON-serializable value for `key`."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO state (namespace, key, value) VALUES (?, ?, ?)",
+                (self.namespace, key, json.dumps(value)),
+            )
+        logging.debug(f"State '{self.namespace}' updated for key '{key}'.")
+
+    def delete(self, key: str):
+        """Removes `key` from the store (e.g. to force a full re-sync)."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+
+class PendingState:
+    """
+    State writes held back until the documents they describe have been stored, so a failed store
+    (or a source dropped at its deadline) never advances a sync mark past unstored data.
+    Collectors queue writes with set()/call(); the caller runs commit() once the docs are safe.
+    """
+
+    def __init__(self):
+        self._writes = []
+        self._lock = threading.Lock()
+
+    def call(self, fn: Callable, *args):
+        """Queues fn(*args) to run on commit()."""
+        with self._lock:
+            self._writes.append((fn, args))
+
+    def set(self, store: StateStore, key: str, value: Any):
+        """Queues store.set(key, value)."""
+        self.call(store.set, key, value)
+
+    def extend(self, other: 'PendingState'):
+        """Takes over the writes queued on another PendingState (e.g. one per source)."""
+        with other._lock:
+            writes = list(other._writes)
+        with self._lock:
+            self._writes.extend(writes)
+
+    def commit(self):
+        """Runs the queued writes in order."""
+        with self._lock:
+            writes, self._writes = self._writes, []
+        for fn, args in writes:
+            fn(*args)
+        if writes:
+            logging.info(f"Committed {len(writes)} pending state update(s).")
+
+
+class _ImmediateState(PendingState):
+    """Writes straight through; the default for callers that don't defer state updates."""
+
+    def call(self, fn: Callable, *args):
+        fn(*args)
+
+
+IMMEDIATE = _ImmediateState()
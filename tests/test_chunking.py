@@ -0,0 +1,22 @@
+# tests/test_chunking.py
+from langchain.schema import Document
+
+import chunking
+
+
+def _sample_docs():
+    paragraph = ("Acme announced a new product line today, expanding its reach into industrial sensors. "
+                 "Analysts expect the move to pressure margins at rivals over the next quarters. ")
+    return [
+        Document(page_content=paragraph * (1 + i % 7), metadata={"source": "newsapi", "url": f"https://example.com/{i}"})
+        for i in range(12)
+    ]
+
+
+def test_parallel_split_matches_serial():
+    serial = chunking.split_documents(_sample_docs(), workers=1)
+    parallel = chunking.split_documents(_sample_docs(), workers=2, parallel_min_docs=0)
+
+    assert len(serial) > len(_sample_docs()) # Long documents were actually split
+    assert [doc.page_content for doc in parallel] == [doc.page_content for doc in serial]
+    assert [doc.metadata for doc in parallel] == [doc.metadata for doc in serial]
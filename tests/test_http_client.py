@@ -0,0 +1,67 @@
+# tests/test_http_client.py
+import socket
+import threading
+import time
+
+import pytest
+
+import http_client
+
+BODY = b"<html><body>" + b"x" * 2000 + b"</body></html>"
+
+
+def _serve(mode: str, sock: socket.socket):
+    """Answers one request per connection: a 'complete' body, a slow 'drip' or a 'stall' after a few bytes."""
+    while True:
+        try:
+            conn, _ = sock.accept()
+        except OSError:
+            return
+        with conn:
+            try:
+                conn.recv(65536)
+                version, connection = ('HTTP/1.0', '') if mode.endswith('1.0') else ('HTTP/1.1', 'Connection: close\r\n')
+                conn.sendall(f"{version} 200 OK\r\nContent-Type: text/html\r\nContent-Length: {len(BODY)}\r\n"
+                             f"{connection}\r\n".encode())
+                if mode == 'complete':
+                    conn.sendall(BODY)
+                elif mode.startswith('drip'):
+                    for i in range(len(BODY)):
+                        conn.sendall(BODY[i:i + 1])
+                        time.sleep(0.05)
+                else: # stall
+                    conn.sendall(BODY[:10])
+                    time.sleep(10)
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def server():
+    sockets = []
+
+    def start(mode: str) -> str:
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        sockets.append(sock)
+        threading.Thread(target=_serve, args=(mode, sock), daemon=True).start()
+        return f"http://127.0.0.1:{sock.getsockname()[1]}/"
+
+    yield start
+    for sock in sockets:
+        sock.close()
+
+
+def test_complete_body_is_not_truncated(server):
+    result = http_client.fetch(server('complete'), deadline_seconds=2)
+    assert result.ok and result.body == BODY and not result.truncated
+
+
+@pytest.mark.parametrize('mode', ['drip-1.0', 'drip-1.1', 'stall-1.0', 'stall-1.1'])
+def test_deadline_cuts_slow_bodies(server, mode):
+    started = time.monotonic()
+    result = http_client.fetch(server(mode), deadline_seconds=1, timeout=5)
+    assert time.monotonic() - started < 2
+    assert result.truncation_reason == 'deadline'
+    assert BODY.startswith(result.body) and len(result.body) >= 10 # Bytes received before the deadline are kept
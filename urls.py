@@ -0,0 +1,157 @@
+# urls.py
+import hashlib
+import logging
+import math
+import os
+import re
+import sqlite3
+import struct
+import threading
+from typing import Iterable, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import config
+
+# Query parameters that only track where a click came from
+TRACKING_PARAM_RE = re.compile(
+    r'^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|igshid|yclid|_ga|_gl|ocid|cmpid|ito|ref|ref_src|'
+    r'smid|sr_share|soc_src|soc_trk|guccounter|outputType|amp)$',
+    re.IGNORECASE,
+)
+AMP_PATH_RE = re.compile(r'(/amp/?$|^/amp(?=/)|\.amp(?=\.html?$))', re.IGNORECASE)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalizes a URL so copies of the same page compare equal:
+    - http/https and a leading 'www.'/'amp.'/'m.' host prefix are ignored (the key always uses https)
+    - default ports, fragments, tracking parameters (utm_*, fbclid, ...) and AMP path markers are dropped
+    - remaining query parameters are sorted and a trailing slash is removed
+    The result is a dedup key; fetch the original URL, not this one.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ('http', 'https'):
+        return url.strip()
+    host = (parts.hostname or '').lower()
+    for prefix in ('www.', 'amp.', 'm.'):
+        # Only a subdomain prefix: 'amp.dev' is a site of its own, not an AMP copy of 'dev'
+        if host.startswith(prefix) and '.' in host[len(prefix):]:
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = AMP_PATH_RE.sub('', parts.path) or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAM_RE.match(k))
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte digests (double hashing), persistable as raw bits."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest: bytes) -> Iterable[int]:
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest: bytes):
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(struct.pack('<QI', self.size, self.hashes))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """Loads saved bits if the file matches this filter's geometry. Returns False otherwise."""
+        try:
+            with open(path, 'rb') as f:
+                size, hashes = struct.unpack('<QI', f.read(12))
+                if (size, hashes) != (self.size, self.hashes):
+                    return False
+                bits = f.read()
+        except (OSError, struct.error):
+            return False
+        if len(bits) != len(self.bits):
+            return False
+        self.bits = bytearray(bits)
+        return True
+
+
+class SeenUrls:
+    """
+    Persistent set of canonical URLs that stays fast as it grows into the millions:
+    a Bloom filter kept in memory answers most "never seen" lookups without touching disk, and an
+    exact SQLite table of 16-byte URL digests settles the Bloom filter's (rare) false positives.
+    """
+
+    def __init__(self, namespace: str, directory: str = config.CACHE_DIRECTORY):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "seen_urls.sqlite3")
+        self.bloom_path = os.path.join(directory, f"seen_urls_{namespace}.bloom")
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen (namespace TEXT NOT NULL, digest BLOB NOT NULL, "
+                "PRIMARY KEY (namespace, digest)) WITHOUT ROWID"
+            )
+        self.bloom = BloomFilter(config.SEEN_URLS_CAPACITY, config.SEEN_URLS_ERROR_RATE)
+        if not self.bloom.load(self.bloom_path):
+            self._rebuild_bloom()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _rebuild_bloom(self):
+        count = 0
+        with self._connect() as conn:
+            for (digest,) in conn.execute("SELECT digest FROM seen WHERE namespace = ?", (self.namespace,)):
+                self.bloom.add(digest)
+                count += 1
+        if count:
+            logging.info(f"Rebuilt '{self.namespace}' seen-URL Bloom filter from {count} stored URLs.")
+
+    @staticmethod
+    def _digest(url: str) -> bytes:
+        return hashlib.blake2b(canonicalize_url(url).encode('utf-8'), digest_size=16).digest()
+
+    def __contains__(self, url: str) -> bool:
+        digest = self._digest(url)
+        with self._lock:
+            if digest not in self.bloom:
+                return False # Definitely never seen: no disk access
+            with self._connect() as conn:
+                row = conn.execute("SELECT 1 FROM seen WHERE namespace = ? AND digest = ?", (self.namespace, digest)).fetchone()
+        return row is not None
+
+    def filter_unseen(self, urls: List[str]) -> List[str]:
+        """Returns the URLs (in order) whose canonical form has not been recorded yet."""
+        return [url for url in urls if url not in self]
+
+    def add_many(self, urls: Iterable[str]):
+        """Records URLs as seen and persists the Bloom filter."""
+        digests = [self._digest(url) for url in urls if url]
+        if not digests:
+            return
+        with self._lock:
+            with self._connect() as conn:
+                conn.executemany("INSERT OR IGNORE INTO seen (namespace, digest) VALUES (?, ?)",
+                                 [(self.namespace, d) for d in digests])
+            for digest in digests:
+                self.bloom.add(digest)
+            self.bloom.save(self.bloom_path)
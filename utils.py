@@ -1,7 +1,12 @@
 # utils.py
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, List, Optional
+import html
 import logging
 import re 
+import unicodedata
+from bs4 import BeautifulSoup
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -11,6 +16,25 @@ def get_date_n_days_ago(days: int) -> str:
     date_n_days_ago = datetime.now() - timedelta(days=days)
     return date_n_days_ago.strftime('%Y-%m-%d')
 
+def parse_date_utc(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses RFC 822 (RSS, HTTP) or ISO 8601 / W3C (Atom, sitemaps) dates into an aware UTC datetime.
+    Date-only values are taken as midnight UTC. Returns None if the value can't be parsed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
 def format_docs_for_llm(docs: list) -> str:
     """Formats a list of LangChain Document objects into a single string for LLM context."""
     # ... (keep existing code for this function) ...
@@ -18,25 +42,62 @@ def format_docs_for_llm(docs: list) -> str:
     for i, doc in enumerate(docs):
         # Limiting metadata displayed to avoid clutter, but keeping essential source/date
         metadata_str = f"Source: {doc.metadata.get('source', 'N/A')}, Date: {doc.metadata.get('publish_date', 'N/A')}"
+        if doc.metadata.get('duplicate_count'):
+            # Near-duplicate copies were suppressed at ingest; how widely a story ran is still useful context
+            metadata_str += f", Also published at {doc.metadata['duplicate_count']} other URL(s)"
         formatted_list.append(f"--- Document {i+1} ({metadata_str}) ---\n{doc.page_content}\n---")
     return "\n".join(formatted_list)
 
 
-# --- ADD THIS FUNCTION ---
+# --- Text cleaning ---
+# NewsAPI truncation indicator like "[+1234 chars]"
+_TRUNCATION_RE = re.compile(r'\[\+\d+\s*chars\]')
+# Zero-width space/non-joiner/joiner, word joiner, soft hyphen and BOM: invisible, but they split tokens
+_ZERO_WIDTH_RE = re.compile('[\u200b\u200c\u200d\u2060\u00ad\ufeff]+')
+
+
+def _clean(text: str) -> str:
+    """Cleans one string; every step is a single linear pass, and most are skipped when not needed."""
+    if '&' in text:
+        text = html.unescape(text)
+    if not text.isascii():
+        if not unicodedata.is_normalized('NFKC', text):
+            text = unicodedata.normalize('NFKC', text) # Full-width/compatibility forms, ligatures
+        text = _ZERO_WIDTH_RE.sub('', text)
+    if '[+' in text:
+        text = _TRUNCATION_RE.sub('', text)
+    # Collapse runs of whitespace (incl. Unicode spaces like NBSP) to a single space, and strip
+    return ' '.join(text.split())
+
+def clean_texts(texts: Iterable[str]) -> List[str]:
+    """
+    Batch version of clean_text(), for large backfills and crawls. Returns the cleaned strings
+    in input order ("" for empty/None inputs).
+    """
+    return [_clean(text) if text else "" for text in texts]
+
 def clean_text(text: str) -> str:
     """
     Performs basic cleaning of text content fetched from NewsAPI or web scraping.
-    - Removes common unwanted characters or sequences (like '[+ N chars]').
+    - Decodes HTML entities and applies Unicode NFKC normalization.
+    - Removes zero-width characters and the NewsAPI '[+ N chars]' truncation indicator.
     - Replaces multiple whitespace characters with a single space.
     - Strips leading/trailing whitespace.
     """
     if not text:
         return ""
+    return _clean(text)
 
-    # Remove common NewsAPI truncation indicator like "[+1234 chars]"
-    text = re.sub(r'\[\+\d+\s*chars\]', '', text)
-
-    # Replace multiple whitespace characters (space, tab, newline) with a single space
-    cleaned = re.sub(r'\s+', ' ', text).strip()
-
-    return cleaned
\ No newline at end of file
+def extract_article_text(html: str) -> str:
+    """
+    Extracts the main article text from an HTML page.
+    Prefers paragraphs inside an <article> element, falling back to all paragraphs on the page.
+    """
+    if not html:
+        return ""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript']):
+        tag.decompose()
+    container = soup.find('article') or soup
+    paragraphs = [p.get_text(' ', strip=True) for p in container.find_all('p')]
+    return "\n".join(p for p in paragraphs if p)